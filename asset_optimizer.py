@@ -0,0 +1,783 @@
+"""
+Batch optimizer for the 3D asset library.
+
+Rewrites GLB and OBJ assets as compact GLB files:
+  - vertices are welded (identical vertices after quantization are merged),
+  - attributes are quantized with KHR_mesh_quantization (16-bit positions,
+    8-bit normals, 16-bit UVs, 16-bit colors), which the bundled GLTFLoader
+    decodes natively,
+  - indices use 16 bits where the vertex count allows.
+It also writes coarse level-of-detail copies (vertex clustering) to a lod/
+folder next to the assets, which the viewer shows while the full file loads.
+Draco and meshopt compression would need decoders the viewer does not ship,
+so they are not used.
+
+Usage:
+  python asset_optimizer.py                 report savings for viewer_assets/3d_assets
+  python asset_optimizer.py --apply         replace the library files (OBJ become .glb) and write LODs
+  python asset_optimizer.py a.obj b.glb     report savings for the given files
+"""
+
+import json
+import math
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import io
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+GLB_MAGIC = b"glTF"
+JSON_CHUNK = 0x4E4F534A
+BIN_CHUNK = 0x004E4942
+
+COMPONENT_DTYPES = {
+    5120: np.int8,
+    5121: np.uint8,
+    5122: np.int16,
+    5123: np.uint16,
+    5125: np.uint32,
+    5126: np.float32,
+}
+DTYPE_COMPONENTS = {np.dtype(v): k for k, v in COMPONENT_DTYPES.items()}
+TYPE_SIZES = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+SIZE_TYPES = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4"}
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+TRIANGLES = 4
+
+# Assets using any of these are left alone
+UNSUPPORTED_EXTENSIONS = {"KHR_draco_mesh_compression", "EXT_meshopt_compression"}
+
+# Coarse LODs: vertices are clustered on a grid with this many cells along the
+# longest side. Assets with fewer triangles than LOD_MIN_TRIANGLES get no LOD.
+LOD_DIR = "lod"
+LOD_GRID = 40
+LOD_MIN_TRIANGLES = 10000
+# LOD textures are downscaled to this size (needs Pillow)
+LOD_TEXTURE_SIZE = 256
+
+# The viewer shows OBJ files rotated by Euler XYZ (-90deg, 0, -90deg); converted
+# OBJs carry the same rotation on their node so they keep their orientation.
+OBJ_ROTATION_XYZ = (-math.pi / 2, 0.0, -math.pi / 2)
+
+
+class SkipAsset(Exception):
+    """The asset uses a feature the optimizer does not handle; it is kept as is."""
+
+
+# --- GLB reading and writing ---
+
+def read_glb(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, length = struct.unpack_from("<4sII", data, 0)
+    if magic != GLB_MAGIC or version != 2:
+        raise ValueError(f"{path} is not a glTF 2.0 binary")
+
+    gltf, binary = None, b""
+    offset = 12
+    while offset < length:
+        chunk_length, chunk_type = struct.unpack_from("<II", data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == JSON_CHUNK:
+            gltf = json.loads(chunk)
+        elif chunk_type == BIN_CHUNK:
+            binary = chunk
+        offset += 8 + chunk_length
+    return gltf, binary
+
+def write_glb(path, gltf, binary):
+    json_bytes = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    json_bytes += b" " * (-len(json_bytes) % 4)
+    binary += b"\0" * (-len(binary) % 4)
+
+    length = 12 + 8 + len(json_bytes) + (8 + len(binary) if binary else 0)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4sII", GLB_MAGIC, 2, length))
+        f.write(struct.pack("<II", len(json_bytes), JSON_CHUNK))
+        f.write(json_bytes)
+        if binary:
+            f.write(struct.pack("<II", len(binary), BIN_CHUNK))
+            f.write(binary)
+
+def read_accessor(gltf, binary, index):
+    """Accessor `index` as a (count, components) array, normalized integers as floats."""
+    accessor = gltf["accessors"][index]
+    if "sparse" in accessor:
+        raise SkipAsset("sparse accessors")
+    dtype = np.dtype(COMPONENT_DTYPES[accessor["componentType"]])
+    size = TYPE_SIZES[accessor["type"]]
+    count = accessor["count"]
+
+    if "bufferView" not in accessor:
+        values = np.zeros((count, size), dtype=dtype)
+    else:
+        view = gltf["bufferViews"][accessor["bufferView"]]
+        if view.get("buffer", 0) != 0 or "uri" in gltf["buffers"][0]:
+            raise SkipAsset("external buffers")
+        start = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+        stride = view.get("byteStride") or dtype.itemsize * size
+        values = np.ndarray(
+            (count, size), dtype=dtype, buffer=binary, offset=start,
+            strides=(stride, dtype.itemsize),
+        ).copy()
+
+    if accessor.get("normalized") and dtype.kind in "iu":
+        limit = float(np.iinfo(dtype).max)
+        values = np.maximum(values.astype(np.float32) / limit, -1.0)
+    return values
+
+
+class GlbBuilder:
+    """Accumulates buffer views and accessors for a single-buffer GLB."""
+
+    def __init__(self):
+        self.chunks = []
+        self.length = 0
+        self.buffer_views = []
+        self.accessors = []
+
+    def add_view(self, data, target=None, byte_stride=None):
+        padding = -self.length % 4
+        if padding:
+            self.chunks.append(b"\0" * padding)
+            self.length += padding
+        view = {"buffer": 0, "byteOffset": self.length, "byteLength": len(data)}
+        if target:
+            view["target"] = target
+        if byte_stride:
+            view["byteStride"] = byte_stride
+        self.chunks.append(data)
+        self.length += len(data)
+        self.buffer_views.append(view)
+        return len(self.buffer_views) - 1
+
+    def add_accessor(self, values, normalized=False, target=ARRAY_BUFFER, bounds=False):
+        values = np.ascontiguousarray(values)
+        count, size = values.shape
+        element = values.dtype.itemsize * size
+
+        if target == ARRAY_BUFFER and element % 4:
+            # Vertex attribute elements must start on 4-byte boundaries
+            stride = element + (-element % 4)
+            padded = np.zeros((count, stride), dtype=np.uint8)
+            padded[:, :element] = values.view(np.uint8).reshape(count, element)
+            view = self.add_view(padded.tobytes(), target, stride)
+        else:
+            view = self.add_view(values.tobytes(), target)
+
+        accessor = {
+            "bufferView": view,
+            "componentType": DTYPE_COMPONENTS[values.dtype],
+            "count": count,
+            "type": SIZE_TYPES[size],
+        }
+        if normalized:
+            accessor["normalized"] = True
+        if bounds:
+            accessor["min"] = values.min(axis=0).tolist()
+            accessor["max"] = values.max(axis=0).tolist()
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+    def binary(self):
+        return b"".join(self.chunks)
+
+
+# --- Quantization and welding ---
+
+def position_grid(positions):
+    """Origin and uniform step mapping positions onto 16-bit unsigned integers."""
+    low = positions.min(axis=0)
+    extent = float((positions.max(axis=0) - low).max())
+    # Uniform scale, so the node transform does not distort normals
+    return low, (extent / 65535.0) or 1.0
+
+def quantize_attribute(name, values, grid):
+    """(quantized values, normalized flag) for a vertex attribute."""
+    if name == "POSITION":
+        low, step = grid
+        return np.clip(np.round((values - low) / step), 0, 65535).astype(np.uint16), False
+    if name in ("NORMAL", "TANGENT"):
+        return np.round(np.clip(values, -1.0, 1.0) * 127.0).astype(np.int8), True
+    if name.startswith("TEXCOORD_") and values.size and values.min() >= 0.0 and values.max() <= 1.0:
+        return np.round(values * 65535.0).astype(np.uint16), True
+    if name.startswith("COLOR_"):
+        # 16 bits, as 8-bit linear color bands visibly in dark tones
+        return np.round(np.clip(values, 0.0, 1.0) * 65535.0).astype(np.uint16), True
+    # Texture coordinates outside [0, 1] and anything else stay float
+    return values.astype(np.float32), False
+
+def weld(attributes, indices):
+    """
+    Merge vertices whose quantized attributes are all equal and drop the
+    triangles that collapse as a result. Vertex order follows first use.
+    """
+    names = sorted(attributes)
+    count = len(attributes[names[0]])
+    rows = np.concatenate(
+        [attributes[n].view(np.uint8).reshape(count, -1) for n in names], axis=1
+    )
+    keys = np.ascontiguousarray(rows).view(np.dtype((np.void, rows.shape[1]))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    # Renumber unique vertices in order of first occurrence (better cache locality)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    remap = rank[inverse.ravel()]
+
+    triangles = remap[indices].reshape(-1, 3)
+    keep = (
+        (triangles[:, 0] != triangles[:, 1])
+        & (triangles[:, 1] != triangles[:, 2])
+        & (triangles[:, 0] != triangles[:, 2])
+    )
+    welded = {n: attributes[n][first[order]] for n in names}
+    return welded, triangles[keep].ravel()
+
+def cluster_vertices(attributes, indices, low, cell):
+    """
+    Vertex-clustering simplification: vertices in the same grid cell collapse
+    into one (mean position, normal and color; the first vertex's texture
+    coordinates), and triangles that become degenerate or duplicated are dropped.
+    """
+    cells = np.floor((attributes["POSITION"] - low) / cell).astype(np.int64)
+    _, first, labels = np.unique(cells, axis=0, return_index=True, return_inverse=True)
+    labels = labels.ravel()
+    count = len(first)
+    sizes = np.bincount(labels, minlength=count).astype(np.float64)
+
+    merged = {}
+    for name, values in attributes.items():
+        if name == "TANGENT":
+            # Averaged tangents are meaningless; three.js derives them instead
+            continue
+        if name in ("POSITION", "NORMAL") or name.startswith("COLOR_"):
+            mean = np.stack(
+                [np.bincount(labels, weights=values[:, c], minlength=count) / sizes for c in range(values.shape[1])],
+                axis=1,
+            ).astype(np.float32)
+            if name == "NORMAL":
+                mean /= np.maximum(np.linalg.norm(mean, axis=1, keepdims=True), 1e-12)
+            merged[name] = mean
+        else:
+            merged[name] = values[first]
+
+    triangles = labels[indices].reshape(-1, 3)
+    keep = (
+        (triangles[:, 0] != triangles[:, 1])
+        & (triangles[:, 1] != triangles[:, 2])
+        & (triangles[:, 0] != triangles[:, 2])
+    )
+    triangles = triangles[keep]
+    _, unique = np.unique(np.sort(triangles, axis=1), axis=0, return_index=True)
+    return merged, triangles[np.sort(unique)].ravel()
+
+def simplified(primitives, grid, lod_grid):
+    low, step = grid
+    cell = step * 65535.0 / lod_grid
+    return [(*cluster_vertices(attributes, indices, low, cell), extra) for attributes, indices, extra in primitives]
+
+def shrink_image(data, mime_type, max_size):
+    """`data` re-encoded at most `max_size` pixels wide/high, or unchanged without Pillow."""
+    if Image is None or mime_type not in ("image/jpeg", "image/png"):
+        return data
+    image = Image.open(io.BytesIO(data))
+    if max(image.size) <= max_size:
+        return data
+    image.thumbnail((max_size, max_size))
+    out = io.BytesIO()
+    if mime_type == "image/jpeg":
+        image.convert("RGB").save(out, "JPEG", quality=85)
+    else:
+        image.save(out, "PNG", optimize=True)
+    return out.getvalue()
+
+def index_array(indices, vertex_count):
+    dtype = np.uint16 if vertex_count < 65535 else np.uint32
+    return indices.astype(dtype).reshape(-1, 1)
+
+def quantized_mesh(builder, primitives, grid):
+    """
+    Write each (attributes, indices, extra) primitive quantized and welded.
+    Returns the glTF primitive list and the vertex counts before and after.
+    """
+    out, before, after = [], 0, 0
+    for attributes, indices, extra in primitives:
+        before += len(attributes["POSITION"])
+        quantized, normalized = {}, {}
+        for name, values in attributes.items():
+            quantized[name], normalized[name] = quantize_attribute(name, values, grid)
+        welded, indices = weld(quantized, indices)
+        after += len(welded["POSITION"])
+
+        primitive = dict(extra)
+        primitive["attributes"] = {
+            name: builder.add_accessor(values, normalized[name], bounds=(name == "POSITION"))
+            for name, values in welded.items()
+        }
+        primitive["indices"] = builder.add_accessor(
+            index_array(indices, len(welded["POSITION"])), target=ELEMENT_ARRAY_BUFFER
+        )
+        primitive["mode"] = TRIANGLES
+        out.append(primitive)
+    return out, before, after
+
+def dequantize_node(mesh_index, grid, name=None):
+    # Maps the 16-bit grid back to model units (column-major matrix)
+    low, step = grid
+    node = {
+        "mesh": mesh_index,
+        "matrix": [
+            step, 0, 0, 0,
+            0, step, 0, 0,
+            0, 0, step, 0,
+            float(low[0]), float(low[1]), float(low[2]), 1,
+        ],
+    }
+    if name:
+        node["name"] = name
+    return node
+
+
+# --- GLB -> GLB ---
+
+def optimize_glb(src_path, lod_grid=None):
+    gltf, binary = read_glb(src_path)
+
+    used = set(gltf.get("extensionsUsed", []))
+    if used & UNSUPPORTED_EXTENSIONS:
+        raise SkipAsset(f"already uses {', '.join(sorted(used & UNSUPPORTED_EXTENSIONS))}")
+    if gltf.get("skins") or gltf.get("animations"):
+        raise SkipAsset("skinned or animated")
+
+    builder = GlbBuilder()
+    before = after = 0
+
+    # Embedded images are carried over unchanged, or downscaled for a LOD
+    for image in gltf.get("images", []):
+        if "bufferView" in image:
+            view = gltf["bufferViews"][image["bufferView"]]
+            start = view.get("byteOffset", 0)
+            data = binary[start:start + view["byteLength"]]
+            if lod_grid:
+                data = shrink_image(data, image.get("mimeType"), LOD_TEXTURE_SIZE)
+            image["bufferView"] = builder.add_view(data)
+
+    for mesh_index, mesh in enumerate(gltf.get("meshes", [])):
+        primitives = []
+        for primitive in mesh["primitives"]:
+            if primitive.get("mode", TRIANGLES) != TRIANGLES or primitive.get("targets"):
+                raise SkipAsset("non-triangle primitives or morph targets")
+            # As float, so already quantized input can be processed again
+            attributes = {
+                name: read_accessor(gltf, binary, accessor).astype(np.float32)
+                for name, accessor in primitive["attributes"].items()
+            }
+            count = len(attributes["POSITION"])
+            if "indices" in primitive:
+                indices = read_accessor(gltf, binary, primitive["indices"]).ravel().astype(np.int64)
+            else:
+                indices = np.arange(count, dtype=np.int64)
+            extra = {k: v for k, v in primitive.items() if k not in ("attributes", "indices", "mode")}
+            primitives.append((attributes, indices, extra))
+
+        grid = position_grid(np.concatenate([p[0]["POSITION"] for p in primitives]))
+        if lod_grid:
+            primitives = simplified(primitives, grid, lod_grid)
+        mesh["primitives"], b, a = quantized_mesh(builder, primitives, grid)
+        before += b
+        after += a
+
+        # The dequantization transform lives on a child node, so the original
+        # node transform and its other children are untouched
+        nodes = gltf.setdefault("nodes", [])
+        for node in list(nodes):
+            if node.get("mesh") == mesh_index:
+                del node["mesh"]
+                nodes.append(dequantize_node(mesh_index, grid, node.get("name")))
+                node.setdefault("children", []).append(len(nodes) - 1)
+
+    gltf["bufferViews"] = builder.buffer_views
+    gltf["accessors"] = builder.accessors
+    binary = builder.binary()
+    gltf["buffers"] = [{"byteLength": len(binary)}]
+    add_quantization_extension(gltf)
+    return gltf, binary, before, after
+
+def add_quantization_extension(gltf):
+    for key in ("extensionsUsed", "extensionsRequired"):
+        names = gltf.setdefault(key, [])
+        if "KHR_mesh_quantization" not in names:
+            names.append("KHR_mesh_quantization")
+
+
+# --- OBJ -> GLB ---
+
+def parse_obj(path):
+    """
+    Positions (with optional per-vertex colors), texture coordinates, normals
+    and triangulated faces from an OBJ file. Materials are not read.
+    """
+    positions, colors, uvs, normals, corners = [], [], [], [], []
+    with open(path, "rb") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            tag = parts[0]
+            if tag == b"v":
+                positions.append([float(x) for x in parts[1:4]])
+                if len(parts) >= 7:
+                    colors.append([float(x) for x in parts[4:7]])
+            elif tag == b"vt":
+                uvs.append([float(x) for x in parts[1:3]])
+            elif tag == b"vn":
+                normals.append([float(x) for x in parts[1:4]])
+            elif tag == b"f":
+                face = []
+                for corner in parts[1:]:
+                    refs = corner.split(b"/")
+                    face.append([int(r) if r else 0 for r in refs] + [0] * (3 - len(refs)))
+                # Fan triangulation of polygons
+                for i in range(1, len(face) - 1):
+                    corners.extend((face[0], face[i], face[i + 1]))
+
+    corners = np.asarray(corners, dtype=np.int64).reshape(-1, 3)
+    # OBJ indices are 1-based, negative ones count from the end
+    for column, size in enumerate((len(positions), len(uvs), len(normals))):
+        refs = corners[:, column]
+        corners[:, column] = np.where(refs < 0, refs + size, refs - 1)
+
+    positions = np.asarray(positions, dtype=np.float32)
+    colors = np.asarray(colors, dtype=np.float32) if len(colors) == len(positions) else None
+    uvs = np.asarray(uvs, dtype=np.float32) if uvs else None
+    normals = np.asarray(normals, dtype=np.float32) if normals else None
+    return positions, colors, uvs, normals, corners
+
+def srgb_to_linear(values):
+    values = np.clip(values, 0.0, 1.0)
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4).astype(np.float32)
+
+def euler_xyz_quaternion(x, y, z):
+    c1, c2, c3 = math.cos(x / 2), math.cos(y / 2), math.cos(z / 2)
+    s1, s2, s3 = math.sin(x / 2), math.sin(y / 2), math.sin(z / 2)
+    return [
+        s1 * c2 * c3 + c1 * s2 * s3,
+        c1 * s2 * c3 - s1 * c2 * s3,
+        c1 * c2 * s3 + s1 * s2 * c3,
+        c1 * c2 * c3 - s1 * s2 * s3,
+    ]
+
+def optimize_obj(src_path, lod_grid=None):
+    positions, colors, uvs, normals, corners = parse_obj(src_path)
+    if not len(corners):
+        raise SkipAsset("no faces")
+
+    # One vertex per corner; welding below merges the duplicates
+    attributes = {"POSITION": positions[corners[:, 0]]}
+    if colors is not None:
+        # OBJLoader reads vertex colors as sRGB, glTF COLOR_0 is linear
+        attributes["COLOR_0"] = srgb_to_linear(colors[corners[:, 0]])
+    if uvs is not None and (corners[:, 1] >= 0).all():
+        # glTF puts the texture origin at the top left, OBJ at the bottom left
+        uv = uvs[corners[:, 1]]
+        attributes["TEXCOORD_0"] = np.stack([uv[:, 0], 1.0 - uv[:, 1]], axis=1)
+    if normals is not None and (corners[:, 2] >= 0).all():
+        attributes["NORMAL"] = normals[corners[:, 2]]
+    indices = np.arange(len(corners), dtype=np.int64)
+
+    builder = GlbBuilder()
+    grid = position_grid(attributes["POSITION"])
+    primitives = [(attributes, indices, {"material": 0})]
+    if lod_grid:
+        primitives = simplified(primitives, grid, lod_grid)
+    primitives, before, after = quantized_mesh(builder, primitives, grid)
+
+    name = os.path.splitext(os.path.basename(src_path))[0]
+    binary = builder.binary()
+    gltf = {
+        "asset": {"version": "2.0", "generator": "SpeakAndSee3D asset_optimizer"},
+        "scene": 0,
+        # Lets the viewer light the converted asset like the OBJ it replaces
+        "scenes": [{"nodes": [0], "extras": {"sourceFormat": "obj"}}],
+        "nodes": [
+            {"name": name, "rotation": euler_xyz_quaternion(*OBJ_ROTATION_XYZ), "children": [1]},
+            dequantize_node(0, grid),
+        ],
+        "meshes": [{"name": name, "primitives": primitives}],
+        # Vertex colors carry the look of generated meshes; keep the surface non-metallic
+        "materials": [{"pbrMetallicRoughness": {"metallicFactor": 0.0, "roughnessFactor": 1.0}}],
+        "accessors": builder.accessors,
+        "bufferViews": builder.buffer_views,
+        "buffers": [{"byteLength": len(binary)}],
+    }
+    add_quantization_extension(gltf)
+    # OBJ vertex count is the number of distinct position/uv/normal corners
+    before = len(np.unique(corners, axis=0))
+    return gltf, binary, before, after
+
+
+# --- Reporting ---
+
+def decode_stats(path):
+    """
+    (seconds to read and decode all vertex data, bytes of vertex and index
+    data the viewer uploads to the GPU) for `path`.
+    """
+    start = time.perf_counter()
+    if path.lower().endswith(".obj"):
+        positions, colors, uvs, normals, corners = parse_obj(path)
+        elapsed = time.perf_counter() - start
+        # OBJLoader emits three float32 vertices per triangle and no indices
+        floats = 3 + 3 * (normals is not None) + 2 * (uvs is not None) + 3 * (colors is not None)
+        return elapsed, len(corners) * floats * 4
+
+    gltf, binary = read_glb(path)
+    gpu_bytes = 0
+    for index, accessor in enumerate(gltf.get("accessors", [])):
+        values = np.asarray(read_accessor(gltf, binary, index))
+        dtype = np.dtype(COMPONENT_DTYPES[accessor["componentType"]])
+        gpu_bytes += values.size * dtype.itemsize
+    return time.perf_counter() - start, gpu_bytes
+
+def convert(src_path, lod_grid=None):
+    ext = os.path.splitext(src_path)[1].lower()
+    if ext == ".obj":
+        return optimize_obj(src_path, lod_grid)
+    if ext == ".glb":
+        return optimize_glb(src_path, lod_grid)
+    raise SkipAsset(f"unsupported format {ext}")
+
+def temp_glb(dst_path, gltf, binary):
+    fd, tmp_path = tempfile.mkstemp(suffix=".glb", dir=os.path.dirname(os.path.abspath(dst_path)))
+    os.close(fd)
+    write_glb(tmp_path, gltf, binary)
+    os.chmod(tmp_path, 0o644)
+    return tmp_path
+
+def triangle_count(gltf):
+    return sum(
+        gltf["accessors"][p["indices"] if "indices" in p else p["attributes"]["POSITION"]]["count"] // 3
+        for mesh in gltf.get("meshes", []) for p in mesh["primitives"]
+    )
+
+def source_triangle_count(path):
+    """Triangles in `path` without converting it: accessor counts for GLB, face corners for OBJ."""
+    if path.lower().endswith(".obj"):
+        triangles = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if line.startswith(b"f "):
+                    triangles += max(len(line.split()) - 3, 0)
+        return triangles
+    return triangle_count(read_glb(path)[0])
+
+def lod_path_for(asset_path):
+    """Where the coarse LOD of `asset_path` is stored: <assets dir>/lod/<name>.glb."""
+    stem = os.path.splitext(os.path.basename(asset_path))[0]
+    return os.path.join(os.path.dirname(asset_path), LOD_DIR, stem + ".glb")
+
+def write_lod(src_path, lod_path=None):
+    """
+    Write a coarse LOD of `src_path` (default location: lod_path_for) and
+    return (full triangles, LOD triangles), or None if the asset is too small
+    to need one.
+    """
+    lod_path = lod_path or lod_path_for(src_path)
+    full_triangles = source_triangle_count(src_path)
+    if full_triangles < LOD_MIN_TRIANGLES:
+        return None
+
+    gltf, binary, _, _ = convert(src_path, LOD_GRID)
+    os.makedirs(os.path.dirname(lod_path), exist_ok=True)
+    tmp_path = temp_glb(lod_path, gltf, binary)
+    os.replace(tmp_path, lod_path)
+    return full_triangles, triangle_count(gltf)
+
+def optimize_asset(src_path, dst_path=None, stats=True):
+    """
+    Write an optimized GLB for `src_path` to `dst_path` (default: next to the
+    source, with a .glb extension) and return a report dict. If the output
+    would not be smaller, nothing is written and "written" is False.
+    Without `stats` the GPU-data and decode-time fields, which parse both
+    files again, are left out.
+    """
+    if dst_path is None:
+        dst_path = os.path.splitext(src_path)[0] + ".glb"
+
+    ext = os.path.splitext(src_path)[1].lower()
+    gltf, binary, before, after = convert(src_path)
+
+    # Written next to the destination first, so a failure never leaves half a file
+    tmp_path = temp_glb(dst_path, gltf, binary)
+    try:
+        report = {
+            "src": src_path,
+            "dst": dst_path,
+            "src_bytes": os.path.getsize(src_path),
+            "dst_bytes": os.path.getsize(tmp_path),
+            "vertices_before": before,
+            "vertices_after": after,
+        }
+        if stats:
+            src_decode, report["src_gpu_bytes"] = decode_stats(src_path)
+            dst_decode, report["dst_gpu_bytes"] = decode_stats(tmp_path)
+            report["src_decode_ms"] = src_decode * 1000.0
+            report["dst_decode_ms"] = dst_decode * 1000.0
+        report["written"] = report["dst_bytes"] < report["src_bytes"] or ext != ".glb"
+        if report["written"]:
+            os.replace(tmp_path, dst_path)
+        return report
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def format_report(report):
+    saved = 1.0 - report["dst_bytes"] / report["src_bytes"]
+    text = (
+        f"{os.path.basename(report['src'])}: "
+        f"{report['src_bytes'] / 1024:.0f} KB -> {report['dst_bytes'] / 1024:.0f} KB ({saved:.0%} smaller), "
+        f"{report['vertices_before']} -> {report['vertices_after']} vertices"
+    )
+    if "src_gpu_bytes" in report:
+        text += (
+            f", GPU data {report['src_gpu_bytes'] / 1024:.0f} KB -> {report['dst_gpu_bytes'] / 1024:.0f} KB, "
+            f"decode {report['src_decode_ms']:.1f} ms -> {report['dst_decode_ms']:.1f} ms"
+        )
+    return text
+
+def unique_filename(assets_dir, filename):
+    """
+    `filename`, or "<stem> (2)<ext>", "<stem> (3)<ext>", ... if an asset with
+    the same stem is already in `assets_dir`. Stems must be unique because
+    the LOD of an asset is stored by stem.
+    """
+    stem, ext = os.path.splitext(filename)
+    taken = {os.path.splitext(name)[0].lower() for name in os.listdir(assets_dir)}
+    candidate, n = stem, 1
+    while candidate.lower() in taken:
+        n += 1
+        candidate = f"{stem} ({n})"
+    return candidate + ext
+
+def import_asset(src_path, assets_dir, filename=None):
+    """
+    Store `src_path` in `assets_dir` as an optimized GLB named after `filename`
+    (default: the source name), or as a plain copy if it cannot be optimized.
+    An existing asset is never replaced: a taken name gets a " (2)" suffix.
+    Returns the filename it was stored under.
+    """
+    filename = filename or os.path.basename(src_path)
+    os.makedirs(assets_dir, exist_ok=True)
+    filename = unique_filename(assets_dir, filename)
+    dst_name = os.path.splitext(filename)[0] + ".glb"
+    try:
+        # The user is waiting on a save or import, so no decode stats
+        report = optimize_asset(src_path, os.path.join(assets_dir, dst_name), stats=False)
+        if report["written"]:
+            print(f"[OK] {format_report(report)}")
+            store_lod(os.path.join(assets_dir, dst_name))
+            return dst_name
+    except Exception as e:
+        print(f"[WARN] Could not optimize {src_path}, storing it unchanged: {e}")
+
+    shutil.copy(src_path, os.path.join(assets_dir, filename))
+    store_lod(os.path.join(assets_dir, filename))
+    return filename
+
+def store_lod(asset_path):
+    """write_lod for a library asset; failures only cost the progressive preview."""
+    try:
+        triangles = write_lod(asset_path)
+        if triangles:
+            print(f"[OK] LOD for {os.path.basename(asset_path)}: {triangles[0]} -> {triangles[1]} triangles")
+    except Exception as e:
+        print(f"[WARN] No LOD for {asset_path}: {e}")
+
+def optimize_library(assets_dir, apply=False, store=None):
+    """
+    Optimize every GLB/OBJ in `assets_dir`. With `apply`, files are replaced;
+    converted OBJs are renamed to .glb in `store` (an AssetStore) as well.
+    """
+    reports = []
+    for filename in sorted(os.listdir(assets_dir)):
+        src_path = os.path.join(assets_dir, filename)
+        if not os.path.isfile(src_path) or not filename.lower().endswith((".glb", ".obj")):
+            continue
+
+        dst_name = os.path.splitext(filename)[0] + ".glb"
+        if apply:
+            dst_path = os.path.join(assets_dir, dst_name)
+            if dst_name != filename and os.path.exists(dst_path):
+                print(f"[WARN] {filename}: {dst_name} already exists, skipped")
+                continue
+        else:
+            dst_path = os.path.join(tempfile.gettempdir(), f"optimized_{dst_name}")
+
+        try:
+            report = optimize_asset(src_path, dst_path)
+        except (SkipAsset, ValueError) as e:
+            print(f"[INFO] {filename}: skipped ({e})")
+            continue
+
+        if not apply and report["written"]:
+            os.remove(dst_path)
+        elif report["written"]:
+            if dst_name != filename:
+                os.remove(src_path)
+            if store is not None:
+                # Also refreshes the stored file hash and size
+                store.rename(filename, dst_name, dst_path)
+        print(f"[OK] {format_report(report)}" if report["written"] else f"[INFO] {filename}: already compact")
+        reports.append(report)
+
+        if apply:
+            store_lod(dst_path if report["written"] else src_path)
+
+    if reports:
+        src_total = sum(r["src_bytes"] for r in reports)
+        dst_total = sum(r["dst_bytes"] if r["written"] else r["src_bytes"] for r in reports)
+        print(f"[INFO] Library: {src_total / 1024**2:.1f} MB -> {dst_total / 1024**2:.1f} MB")
+    return reports
+
+def main():
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    apply = "--apply" in sys.argv
+
+    if args:
+        for path in args:
+            dst_path = None if apply else os.path.join(
+                tempfile.gettempdir(), "optimized_" + os.path.splitext(os.path.basename(path))[0] + ".glb"
+            )
+            try:
+                report = optimize_asset(path, dst_path)
+            except (SkipAsset, ValueError) as e:
+                print(f"[INFO] {path}: skipped ({e})")
+                continue
+            print(f"[OK] {format_report(report)}")
+            if not apply and report["written"]:
+                os.remove(report["dst"])
+        return
+
+    from asset_store import AssetStore
+    from utils import get_viewer_assets
+
+    viewer_assets = get_viewer_assets()
+    store = AssetStore(os.path.join(viewer_assets, "assets.db")) if apply else None
+    optimize_library(os.path.join(viewer_assets, "3d_assets"), apply=apply, store=store)
+    if not apply:
+        print("[INFO] Dry run; pass --apply to replace the files")
+
+if __name__ == "__main__":
+    main()
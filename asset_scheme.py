@@ -0,0 +1,190 @@
+from PySide6.QtWebEngineCore import QWebEngineUrlScheme, QWebEngineUrlSchemeHandler, QWebEngineUrlRequestJob
+from PySide6.QtCore import QBuffer, QByteArray, QIODevice, QUrl
+from collections import OrderedDict
+from urllib.parse import quote
+import mimetypes
+import hashlib
+import os
+
+SCHEME = b"asset"
+HOST = "viewer"
+
+MIME_TYPES = {
+    ".glb": "model/gltf-binary",
+    ".gltf": "model/gltf+json",
+    ".obj": "model/obj",
+    ".bin": "application/octet-stream",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".html": "text/html",
+    ".js": "text/javascript",
+    ".css": "text/css",
+    ".json": "application/json",
+}
+
+def register_asset_scheme():
+    """Must be called before the QApplication is created."""
+    scheme = QWebEngineUrlScheme(SCHEME)
+    # Host syntax gives the page a real origin, so module workers can be loaded
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(
+        QWebEngineUrlScheme.SecureScheme
+        | QWebEngineUrlScheme.LocalAccessAllowed
+        | QWebEngineUrlScheme.CorsEnabled
+        | QWebEngineUrlScheme.FetchApiAllowed
+    )
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+def mime_type_for(filename):
+    ext = os.path.splitext(filename)[1].lower()
+    return MIME_TYPES.get(ext) or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+def cache_digest(url):
+    """The content hash in an asset://viewer/cache/<hash>/<name> URL, or None."""
+    parts = url.split("/cache/", 1)
+    return parts[1].split("/", 1)[0] if len(parts) == 2 else None
+
+# Files registered with direct_url_for that can still be requested
+MAX_DIRECT_FILES = 256
+
+class AssetCache:
+    """
+    In-process byte cache of model files keyed by content hash, bounded by
+    total size (least recently used entries are evicted). A file is only
+    re-read when its size or mtime changed, and the hash is part of the URL,
+    so the web engine can never serve an outdated copy.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, on_evict=None):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.blobs = OrderedDict()  # content hash -> bytes
+        self.files = {}             # path -> (mtime_ns, size, content hash)
+        self.on_evict = on_evict    # called with the hash of bytes dropped from the cache
+        self.direct = OrderedDict() # token -> path, for files read from disk on every request
+
+    def url_for(self, path):
+        digest = self.add_file(path)
+        return f"{SCHEME.decode()}://{HOST}/cache/{digest}/{quote(os.path.basename(path))}"
+
+    def direct_url_for(self, path):
+        """
+        URL that serves `path` straight from disk without storing it, for
+        one-off reads such as gallery thumbnails that should not evict the
+        models the viewer is using.
+        """
+        path = os.path.abspath(path)
+        token = hashlib.blake2b(path.encode("utf-8"), digest_size=8).hexdigest()
+        self.direct[token] = path
+        self.direct.move_to_end(token)
+        while len(self.direct) > MAX_DIRECT_FILES:
+            self.direct.popitem(last=False)
+        return f"{SCHEME.decode()}://{HOST}/file/{token}/{quote(os.path.basename(path))}"
+
+    def read_direct(self, token):
+        path = self.direct.get(token)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def add_file(self, path):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        known = self.files.get(path)
+        if known and known[:2] == (st.st_mtime_ns, st.st_size) and known[2] in self.blobs:
+            self.blobs.move_to_end(known[2])
+            return known[2]
+
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        self.files[path] = (st.st_mtime_ns, st.st_size, digest)
+        self._put(digest, data)
+        return digest
+
+    def _put(self, digest, data):
+        if digest in self.blobs:
+            self.blobs.move_to_end(digest)
+            return
+        self.blobs[digest] = data
+        self.total_bytes += len(data)
+        # Never evict the entry just added, even if it alone exceeds the budget
+        while self.total_bytes > self.max_bytes and len(self.blobs) > 1:
+            old_digest, old = self.blobs.popitem(last=False)
+            self.total_bytes -= len(old)
+            self._forget(old_digest)
+
+    def _forget(self, digest):
+        for path in [p for p, known in self.files.items() if known[2] == digest]:
+            del self.files[path]
+        if self.on_evict is not None:
+            self.on_evict(digest)
+
+    def get(self, digest):
+        data = self.blobs.get(digest)
+        if data is not None:
+            self.blobs.move_to_end(digest)
+        return data
+
+    def clear(self):
+        self.blobs.clear()
+        self.files.clear()
+        self.total_bytes = 0
+
+class AssetSchemeHandler(QWebEngineUrlSchemeHandler):
+    """
+    Serves the viewer from one origin:
+    asset://viewer/cache/<hash>/<filename> from an AssetCache,
+    asset://viewer/file/<token>/<filename> from disk (AssetCache.direct_url_for), and any other
+    asset://viewer/<path> from the static viewer directory.
+    """
+
+    def __init__(self, cache, static_dir, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.static_dir = os.path.abspath(static_dir)
+
+    def page_url(self, filename):
+        return QUrl(f"{SCHEME.decode()}://{HOST}/{quote(filename)}")
+
+    def _lookup(self, path):
+        parts = path.strip("/").split("/")
+        if len(parts) >= 2 and parts[0] == "cache":
+            return self.cache.get(parts[1]), parts[-1], True
+        if len(parts) >= 2 and parts[0] == "file":
+            return self.cache.read_direct(parts[1]), parts[-1], False
+
+        filename = os.path.abspath(os.path.join(self.static_dir, path.strip("/")))
+        # Refuse anything outside the viewer directory
+        if not filename.startswith(self.static_dir + os.sep) or not os.path.isfile(filename):
+            return None, filename, False
+        return self.cache.get(self.cache.add_file(filename)), filename, False
+
+    def requestStarted(self, job):
+        url = job.requestUrl()
+        data, filename, immutable = (None, "", False) if url.host() != HOST else self._lookup(url.path(QUrl.FullyDecoded))
+        if data is None:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+
+        # No range support: reply() always answers 200, so every response is the whole file
+        headers = {}
+        if immutable:
+            # Hash-addressed, the content behind this URL can never change
+            headers[b"Cache-Control"] = b"max-age=31536000, immutable"
+        else:
+            headers[b"Cache-Control"] = b"no-cache"
+
+        # setAdditionalResponseHeaders is only available from Qt 6.6
+        if hasattr(job, "setAdditionalResponseHeaders"):
+            job.setAdditionalResponseHeaders({QByteArray(k): QByteArray(v) for k, v in headers.items()})
+
+        buf = QBuffer(job)  # owned by the job, freed with it
+        buf.setData(QByteArray(data))
+        buf.open(QIODevice.ReadOnly)
+        job.reply(mime_type_for(filename).encode(), buf)
@@ -0,0 +1,219 @@
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    filename        TEXT PRIMARY KEY,
+    description     TEXT NOT NULL,
+    file_hash       TEXT,
+    size            INTEGER,
+    format          TEXT,
+    desc_hash       TEXT,
+    embedding_model TEXT,
+    embedding       BLOB
+)
+"""
+
+# PRAGMA user_version once model_descriptions.json has been imported
+JSON_IMPORTED_VERSION = 1
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+class AssetStore:
+    """
+    SQLite store for the 3D asset library: filename, description, file hash,
+    size, format and the description embedding. Every write is its own
+    transaction, and WAL mode lets several app instances read and write the
+    same library. Descriptions are cached in memory and only re-read when
+    another connection has committed a change.
+    """
+
+    def __init__(self, db_path, json_path=None):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+        self._descriptions = None
+        self._data_version = None
+
+        # First run: seed the store from the legacy model_descriptions.json.
+        # Recorded in user_version, so a library emptied later is not re-seeded.
+        if json_path and self._schema_version() < JSON_IMPORTED_VERSION:
+            if self.count() == 0:
+                self.import_json(json_path)
+            with self._lock, self._conn:
+                self._conn.execute(f"PRAGMA user_version = {JSON_IMPORTED_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _schema_version(self):
+        with self._lock:
+            return self._conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+
+    def _current_version(self):
+        # Changes whenever another connection commits to the database
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def changed(self):
+        """True if another connection modified the store since it was last read."""
+        with self._lock:
+            return self._data_version is not None and self._current_version() != self._data_version
+
+    def descriptions(self):
+        """{filename: description}, served from memory unless the store changed."""
+        with self._lock:
+            version = self._current_version()
+            if self._descriptions is None or version != self._data_version:
+                rows = self._conn.execute("SELECT filename, description FROM assets ORDER BY rowid")
+                self._descriptions = dict(rows.fetchall())
+                self._data_version = version
+            return dict(self._descriptions)
+
+    def get(self, filename):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT filename, description, file_hash, size, format FROM assets WHERE filename = ?",
+                (filename,),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("filename", "description", "file_hash", "size", "format"), row))
+
+    def assets(self):
+        """Every asset as a dict (filename, description, file_hash, size, format), sorted by filename."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT filename, description, file_hash, size, format FROM assets "
+                "ORDER BY filename COLLATE NOCASE"
+            ).fetchall()
+        return [dict(zip(("filename", "description", "file_hash", "size", "format"), row)) for row in rows]
+
+    def put(self, filename, description, file_path=None):
+        """Insert or update an asset. File hash/size/format are read from `file_path` if it exists."""
+        digest = size = None
+        fmt = os.path.splitext(filename)[1].lstrip(".").lower() or None
+        if file_path and os.path.isfile(file_path):
+            digest = file_hash(file_path)
+            size = os.path.getsize(file_path)
+
+        with self._lock, self._conn:
+            # Keep an existing embedding; it is only reused if desc_hash still matches
+            self._conn.execute(
+                """
+                INSERT INTO assets (filename, description, file_hash, size, format)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(filename) DO UPDATE SET
+                    description = excluded.description,
+                    file_hash = COALESCE(excluded.file_hash, assets.file_hash),
+                    size = COALESCE(excluded.size, assets.size),
+                    format = excluded.format
+                """,
+                (filename, description, digest, size, fmt),
+            )
+            if self._descriptions is not None:
+                self._descriptions[filename] = description
+
+    def set_file_hash(self, filename, digest, size):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE assets SET file_hash = ?, size = ? WHERE filename = ?",
+                (digest, size, filename),
+            )
+
+    def delete(self, filename):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM assets WHERE filename = ?", (filename,))
+            if self._descriptions is not None:
+                self._descriptions.pop(filename, None)
+
+    def rename(self, old, new, file_path=None):
+        """Move an asset (description and embedding) to a new filename, e.g. after a format conversion."""
+        digest = size = None
+        fmt = os.path.splitext(new)[1].lstrip(".").lower() or None
+        if file_path and os.path.isfile(file_path):
+            digest = file_hash(file_path)
+            size = os.path.getsize(file_path)
+
+        with self._lock, self._conn:
+            if new != old:
+                self._conn.execute("DELETE FROM assets WHERE filename = ?", (new,))
+            self._conn.execute(
+                """
+                UPDATE assets SET
+                    filename = ?,
+                    file_hash = COALESCE(?, file_hash),
+                    size = COALESCE(?, size),
+                    format = ?
+                WHERE filename = ?
+                """,
+                (new, digest, size, fmt, old),
+            )
+            if self._descriptions is not None and old in self._descriptions:
+                self._descriptions[new] = self._descriptions.pop(old)
+
+    def get_embeddings(self, model, filenames):
+        """{filename: (desc_hash, vector)} for stored embeddings made by `model`."""
+        result = {}
+        filenames = list(filenames)
+        with self._lock:
+            # Chunked to stay below SQLite's bound-parameter limit
+            for start in range(0, len(filenames), 500):
+                chunk = filenames[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT filename, desc_hash, embedding FROM assets "
+                    f"WHERE embedding_model = ? AND filename IN ({','.join('?' * len(chunk))})",
+                    [model] + chunk,
+                )
+                for filename, desc_hash, blob in rows:
+                    if blob is not None:
+                        result[filename] = (desc_hash, np.frombuffer(blob, dtype=np.float32))
+        return result
+
+    def put_embeddings(self, model, rows):
+        """Store (filename, desc_hash, vector) rows in a single transaction."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE assets SET desc_hash = ?, embedding_model = ?, embedding = ? WHERE filename = ?",
+                [
+                    (desc_hash, model, np.asarray(vector, dtype=np.float32).tobytes(), filename)
+                    for filename, desc_hash, vector in rows
+                ],
+            )
+
+    def import_json(self, json_path):
+        try:
+            if not os.path.exists(json_path):
+                return
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Failed to load descriptions from {json_path}: {e}")
+            return
+        if not isinstance(data, dict):
+            return
+
+        assets_dir = os.path.join(os.path.dirname(json_path), "3d_assets")
+        for filename, description in data.items():
+            self.put(filename, description, os.path.join(assets_dir, filename))
+        print(f"[INFO] Imported {len(data)} asset descriptions from {json_path}")
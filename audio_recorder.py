@@ -1,36 +1,165 @@
 import sounddevice as sd
 import numpy as np
+import threading
 import wave
 import os
 from utils import get_audio_dir
 
+def chunk_rms(samples):
+    if len(samples) == 0:
+        return 0.0
+    samples = samples.astype(np.float32)
+    return float(np.sqrt(np.mean(samples * samples)))
+
 class AudioRecorder:
-    def __init__(self, samplerate=16000):
+    def __init__(self, samplerate=16000, trim_silence=True, auto_stop_after=None, silence_threshold=500.0,
+                 save_wav=True, grow_seconds=60):
         self.samplerate = samplerate
         self.channels = 1
-        self.frames = []
+        self.audio_data = None
         self.stream = None
+        self.on_audio = None  # optional listener, called with each new chunk
+        self.save_wav = save_wav  # False = in-memory handoff only, see audio_data
         self.filename = os.path.join(get_audio_dir(), "recording.wav")
 
+        # Preallocated int16 buffer, grown in large steps instead of per chunk
+        self.grow_samples = int(grow_seconds * samplerate)
+        self._buffer = np.empty(0, dtype=np.int16)
+        self._length = 0
+        self._lock = threading.Lock()
+
+        # Voice activity detection
+        self.trim_silence = trim_silence
+        self.auto_stop_after = auto_stop_after  # seconds of silence after speech, None = manual stop
+        self.silence_threshold = silence_threshold  # int16 RMS
+        self.pad_samples = int(0.2 * samplerate)  # silence kept around speech when trimming
+        self.heard_speech = False
+        self.silent_samples = 0
+        self.auto_stop_requested = False  # polled by the UI, set from the audio thread
+        self._speech_start = None
+        self._speech_end = 0
+
+        # Background WAV writer
+        self._writer = None
+        self._writer_stop = threading.Event()
+        self._wav = None
+        self._written = None
+
         audio_dir = os.path.dirname(self.filename)
         os.makedirs(audio_dir, exist_ok=True)
 
     def _callback(self, indata, frames, time, status):
         if status:
             print(status)
-        self.frames.append(indata.copy())
+        chunk = indata.reshape(-1)
+
+        with self._lock:
+            start = self._length
+            end = start + len(chunk)
+            if end > len(self._buffer):
+                grown = np.empty(max(end, len(self._buffer) + self.grow_samples), dtype=np.int16)
+                grown[:start] = self._buffer[:start]
+                self._buffer = grown
+            self._buffer[start:end] = chunk
+
+            if chunk_rms(chunk) >= self.silence_threshold:
+                if self._speech_start is None:
+                    self._speech_start = start
+                self._speech_end = end
+                self.heard_speech = True
+                self.silent_samples = 0
+            else:
+                self.silent_samples += len(chunk)
+                if (self.auto_stop_after and self.heard_speech
+                        and self.silent_samples >= self.auto_stop_after * self.samplerate):
+                    self.auto_stop_requested = True
+
+            self._length = end
+
+        if self.on_audio is not None:
+            self.on_audio(self._buffer[start:end])
+
+    def _bounds(self, final=False):
+        """
+        Sample range that belongs in the recording so far. While recording,
+        audio after the last speech is held back in case it turns out to be
+        trailing silence. Call with the lock held.
+        """
+        if not self.trim_silence:
+            return 0, self._length
+        if self._speech_start is None:
+            # No speech (yet); keep everything if the recording is over
+            return (0, self._length) if final else (0, 0)
+        start = max(0, self._speech_start - self.pad_samples)
+        end = min(self._length, self._speech_end + self.pad_samples)
+        return start, end
+
+    def _write_pending(self, final=False):
+        with self._lock:
+            buf = self._buffer
+            start, end = self._bounds(final)
+        if end <= start:
+            return
+        if self._written is None:
+            self._written = start
+        if end > self._written:
+            # buf is never modified below _length, so this view is safe to read unlocked
+            self._wav.writeframesraw(buf[self._written:end].tobytes())
+            self._written = end
+
+    def _write_loop(self):
+        while not self._writer_stop.wait(0.25):
+            self._write_pending()
+
+    def _begin(self):
+        # Reset state for a new recording, without touching the audio device
+        self._buffer = np.empty(self.grow_samples, dtype=np.int16)
+        self._length = 0
+        self.audio_data = None
+        self.heard_speech = False
+        self.silent_samples = 0
+        self.auto_stop_requested = False
+        self._speech_start = None
+        self._speech_end = 0
+
+        if self.save_wav:
+            self._wav = wave.open(self.filename, 'wb')
+            self._wav.setnchannels(self.channels)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(self.samplerate)
+            self._written = None
+            self._writer_stop.clear()
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
 
     def start(self):
-        self.frames = []
-        self.stream = sd.InputStream(
-            samplerate=self.samplerate,
-            channels=self.channels,
-            dtype='int16',
-            callback=self._callback
-        )
-        self.stream.start()
+        self._begin()
+        try:
+            self.stream = sd.InputStream(
+                samplerate=self.samplerate,
+                channels=self.channels,
+                dtype='int16',
+                callback=self._callback
+            )
+            self.stream.start()
+        except Exception:
+            # No usable input device; don't leave the writer thread or the WAV file open
+            if self.stream is not None:
+                self.stream.close()
+                self.stream = None
+            self._end_writer()
+            raise
         print("Recording started...")
 
+    def _end_writer(self):
+        if self._writer is not None:
+            self._writer_stop.set()
+            self._writer.join()
+            self._writer = None
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
     def stop(self):
         if self.stream is not None:
             self.stream.stop()
@@ -38,12 +167,20 @@ class AudioRecorder:
             self.stream = None
             print("Recording stopped, saving...")
 
-            audio_data = np.concatenate(self.frames, axis=0)
+            with self._lock:
+                start, end = self._bounds(final=True)
+            if self.trim_silence and self._length > end - start:
+                print(f"Trimmed {(self._length - (end - start)) / self.samplerate:.2f}s of silence")
 
-            with wave.open(self.filename, 'w') as wf:
-                wf.setnchannels(self.channels)
-                wf.setsampwidth(2)
-                wf.setframerate(self.samplerate)
-                wf.writeframes(audio_data.tobytes())
+            # Keep the samples so they can be handed to transcription directly
+            self.audio_data = self._buffer[start:end]
 
-            print("Saved:", self.filename)
+            if self._writer is not None:
+                # Only the audio since the writer's last pass is left to write
+                self._writer_stop.set()
+                self._writer.join()
+                self._writer = None
+                self._write_pending(final=True)
+                self._wav.close()
+                self._wav = None
+                print("Saved:", self.filename)
@@ -0,0 +1,87 @@
+"""
+Benchmark AudioRecorder on simulated long recordings.
+
+Feeds synthetic int16 chunks straight into AudioRecorder._callback (no audio
+device needed) and compares it with the previous list-of-chunks recorder,
+reporting time spent in stop() and peak Python memory.
+
+Usage: python bench_audio_recorder.py [minutes]
+"""
+import os
+import sys
+import time
+import wave
+import tempfile
+import tracemalloc
+import numpy as np
+from audio_recorder import AudioRecorder
+
+SAMPLERATE = 16000
+BLOCK = 512  # frames per callback, typical for sounddevice
+
+class ListRecorder:
+    # The previous implementation: list of copies, concatenate + write on stop
+    def __init__(self, filename):
+        self.frames = []
+        self.filename = filename
+
+    def _callback(self, indata, frames, time, status):
+        self.frames.append(indata.copy())
+
+    def stop(self):
+        audio_data = np.concatenate(self.frames, axis=0)
+        with wave.open(self.filename, 'w') as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(SAMPLERATE)
+            wf.writeframes(audio_data.tobytes())
+
+class _NullStream:
+    def stop(self): pass
+    def close(self): pass
+
+def make_blocks(minutes):
+    rng = np.random.default_rng(0)
+    n_blocks = int(minutes * 60 * SAMPLERATE / BLOCK)
+    # Alternating speech-like noise and silence, reused to keep setup cheap
+    speech = (rng.standard_normal((BLOCK, 1)) * 3000).astype(np.int16)
+    silence = np.zeros((BLOCK, 1), dtype=np.int16)
+    return [speech if (i // 200) % 2 == 0 else silence for i in range(n_blocks)]
+
+def run(name, recorder, blocks, realtime_s):
+    tracemalloc.start()
+    feed_start = time.perf_counter()
+    for block in blocks:
+        recorder._callback(block, BLOCK, None, None)
+    feed_s = time.perf_counter() - feed_start
+
+    stop_start = time.perf_counter()
+    recorder.stop()
+    stop_s = time.perf_counter() - stop_start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<28} feed {feed_s:6.2f}s ({feed_s / realtime_s * 100:5.2f}% of realtime)"
+          f"  stop() {stop_s * 1000:8.1f} ms  peak {peak / 2**20:7.1f} MiB")
+
+def main():
+    minutes = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    blocks = make_blocks(minutes)
+    realtime_s = minutes * 60
+    print(f"Simulated recording: {minutes:g} min, {len(blocks)} callbacks of {BLOCK} frames")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        run("list + concatenate (old)", ListRecorder(os.path.join(tmp, "old.wav")), blocks, realtime_s)
+
+        for name, kwargs in [
+            ("buffer + incremental WAV", {"save_wav": True}),
+            ("buffer, in-memory only", {"save_wav": False}),
+        ]:
+            recorder = AudioRecorder(SAMPLERATE, trim_silence=False, **kwargs)
+            recorder.filename = os.path.join(tmp, "new.wav")
+            recorder._begin()
+            recorder.stream = _NullStream()
+            run(name, recorder, blocks, realtime_s)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark semantic search query latency against library size.
+
+Uses random normalized 384-d vectors (the all-MiniLM-L6-v2 size) so no model
+is needed; this measures only the search over the embedding matrix.
+
+Usage: python bench_model_selector.py [sizes...]
+"""
+import sys
+import time
+import numpy as np
+import embedding_index
+from embedding_index import EmbeddingIndex
+
+DIM = 384
+QUERIES = 200
+
+def random_embeddings(n, rng):
+    x = rng.standard_normal((n, DIM)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+def time_queries(fn, queries):
+    fn(queries[0])  # warm up (and build the ANN index, if any)
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+def main():
+    sizes = [int(s) for s in sys.argv[1:]] or [100, 1000, 10000, 50000, 100000]
+    rng = np.random.default_rng(0)
+    queries = random_embeddings(QUERIES, rng)
+
+    print(f"{'entries':>8}  {'argmax (old)':>12}  {'top-5 exact':>11}  {'top-5 ANN':>9}  {'ANN recall@5':>12}")
+    for n in sizes:
+        threshold = embedding_index.ANN_THRESHOLD
+        embedding_index.ANN_THRESHOLD = float("inf")
+        index = EmbeddingIndex(None, "bench")  # search never touches the store
+        index.set_rows([f"asset_{i}.glb" for i in range(n)], [None] * n, random_embeddings(n, rng))
+
+        # Previous behaviour: full score vector, argmax, fresh list of keys per query
+        names = dict.fromkeys(index.ids)
+        old_ms = time_queries(lambda q: list(names.keys())[int(np.argmax(index.matrix @ q))], queries)
+
+        exact_ms = time_queries(lambda q: index.search(q, 5), queries)
+        exact = [{i for i, _ in index.search(q, 5)} for q in queries]
+
+        ann_ms, recall = "n/a", "n/a"
+        if embedding_index.hnswlib is not None:
+            embedding_index.ANN_THRESHOLD = 0
+            index.build_ann()
+            ann_ms = f"{time_queries(lambda q: index.search(q, 5), queries):.3f}ms"
+            hits = sum(len(exact[j] & {i for i, _ in index.search(q, 5)}) for j, q in enumerate(queries))
+            recall = f"{hits / (5 * len(queries)):.3f}"
+        embedding_index.ANN_THRESHOLD = threshold
+
+        print(f"{n:>8}  {old_ms:>10.3f}ms  {exact_ms:>9.3f}ms  {ann_ms:>9}  {recall:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark app startup: time from process start to the main window's first
+paint, and to the first answered text query in load mode.
+
+Usage: python bench_startup.py [query]
+"""
+import time
+SCRIPT_START = time.time()
+
+import os
+import sys
+import multiprocessing
+
+try:
+    import psutil
+    PROCESS_START = psutil.Process(os.getpid()).create_time()
+except ImportError:
+    PROCESS_START = SCRIPT_START  # interpreter startup is not included
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QObject, QEvent, QTimer
+from utils import get_data_dir
+import main
+
+def since_start():
+    return time.time() - PROCESS_START
+
+class FirstPaint(QObject):
+    def __init__(self):
+        super().__init__()
+        self.at = None
+
+    def eventFilter(self, obj, event):
+        if self.at is None and event.type() == QEvent.Paint:
+            self.at = since_start()
+        return False
+
+def run():
+    query = sys.argv[1] if len(sys.argv) > 1 else "a lion"
+
+    main.register_asset_scheme()
+    app = QApplication(sys.argv)
+    app.setStyleSheet(main.load_stylesheet(os.path.join(get_data_dir(), "style.qss")))
+
+    first_paint = FirstPaint()
+    window_start = since_start()
+    window = main.MainWindow()
+    window_built = since_start()
+    window.installEventFilter(first_paint)
+    window.show()
+
+    results = {}
+
+    def poll():
+        if first_paint.at is not None and "paint" not in results:
+            results["paint"] = first_paint.at
+        if "paint" in results and window.selector.is_ready():
+            window.selector.get_best_match(query)
+            results["match"] = since_start()
+            app.quit()
+            return
+        QTimer.singleShot(5, poll)
+
+    QTimer.singleShot(0, poll)
+    app.exec()
+
+    print(f"imports done         {window_start:7.3f}s")
+    print(f"MainWindow built     {window_built:7.3f}s")
+    print(f"first paint          {results.get('paint', float('nan')):7.3f}s")
+    print(f"first match ({query!r}) {results.get('match', float('nan')):7.3f}s")
+    window.close()
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    run()
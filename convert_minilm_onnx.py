@@ -0,0 +1,106 @@
+"""
+Export all-MiniLM-L6-v2 to an int8-quantized ONNX model for OnnxEncoder,
+then check its embeddings against the original SentenceTransformer.
+
+Usage: python convert_minilm_onnx.py
+Needs torch, sentence_transformers, onnx and onnxruntime (build machine only;
+the app itself only needs onnxruntime and tokenizers).
+"""
+import os
+import sys
+import json
+import shutil
+import sqlite3
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+from onnxruntime.quantization import quantize_dynamic, QuantType
+from onnx_encoder import OnnxEncoder, ONNX_MODEL_FILE
+from utils import get_models_dir, get_viewer_assets
+
+SRC_DIR = os.path.join(get_models_dir(), "all-MiniLM-L6-v2")
+OUT_DIR = os.path.join(get_models_dir(), "all-MiniLM-L6-v2-onnx")
+
+MIN_COSINE = 0.98  # per-sentence agreement with the torch embeddings
+
+class TokenEmbeddings(torch.nn.Module):
+    # Fixed positional signature for the exporter, returns last_hidden_state only
+    def __init__(self, transformer):
+        super().__init__()
+        self.transformer = transformer
+
+    def forward(self, input_ids, attention_mask, token_type_ids):
+        return self.transformer(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            token_type_ids=token_type_ids,
+        ).last_hidden_state
+
+def export(st_model):
+    os.makedirs(OUT_DIR, exist_ok=True)
+    transformer = TokenEmbeddings(st_model[0].auto_model).eval()
+    fp32_path = os.path.join(OUT_DIR, "model_fp32.onnx")
+
+    dummy = st_model.tokenize(["a 3D model of a lion"])
+    torch.onnx.export(
+        transformer,
+        (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+        fp32_path,
+        input_names=["input_ids", "attention_mask", "token_type_ids"],
+        output_names=["last_hidden_state"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "token_type_ids": {0: "batch", 1: "sequence"},
+            "last_hidden_state": {0: "batch", 1: "sequence"},
+        },
+        opset_version=14,
+        dynamo=False,  # TorchScript exporter, honours dynamic_axes
+    )
+
+    quantize_dynamic(fp32_path, os.path.join(OUT_DIR, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+
+    shutil.copy(os.path.join(SRC_DIR, "tokenizer.json"), os.path.join(OUT_DIR, "tokenizer.json"))
+    print(f"[OK] Wrote {os.path.join(OUT_DIR, ONNX_MODEL_FILE)}")
+
+def load_descriptions():
+    # Read-only: verifying must not create, seed or write the app's asset store
+    db_path = os.path.join(get_viewer_assets(), "assets.db")
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            return [row[0] for row in conn.execute("SELECT description FROM assets ORDER BY rowid")]
+        finally:
+            conn.close()
+    with open(os.path.join(get_viewer_assets(), "model_descriptions.json"), "r", encoding="utf-8") as f:
+        return list(json.load(f).values())
+
+def verify(st_model):
+    descriptions = load_descriptions()
+    queries = ["a lion", "steam train", "something that flies", "a big grey animal with a trunk",
+               "Cute Robot Squirrel", "a soldier from the first world war"]
+
+    onnx_model = OnnxEncoder(OUT_DIR)
+    ref = st_model.encode(descriptions + queries, convert_to_numpy=True, normalize_embeddings=True)
+    out = onnx_model.encode(descriptions + queries)
+
+    cosines = np.sum(ref * out, axis=1)
+    print(f"Cosine vs torch: min {cosines.min():.4f}  mean {cosines.mean():.4f}")
+
+    # The ranking is what matters for ModelSelector: same best match per query
+    n = len(descriptions)
+    ref_best = np.argmax(ref[n:] @ ref[:n].T, axis=1)
+    out_best = np.argmax(out[n:] @ out[:n].T, axis=1)
+    agree = int(np.sum(ref_best == out_best))
+    print(f"Top-1 agreement: {agree}/{len(queries)}")
+
+    return cosines.min() >= MIN_COSINE and agree == len(queries)
+
+if __name__ == "__main__":
+    st_model = SentenceTransformer(SRC_DIR, device="cpu")
+    export(st_model)
+    if not verify(st_model):
+        print("[ERROR] ONNX embeddings do not match the torch model.")
+        sys.exit(1)
+    print("[OK] ONNX encoder matches the torch model.")
@@ -0,0 +1,261 @@
+import hashlib
+import threading
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# Above this many entries search() uses an approximate HNSW index (if hnswlib
+# is installed); below it exact search is both faster and exact.
+ANN_THRESHOLD = 20000
+
+def text_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+class EmbeddingIndex:
+    """
+    In-memory matrix of normalized description embeddings used for search.
+    Vectors are persisted per asset in the AssetStore, so only new or changed
+    descriptions are ever encoded and each change writes a single row.
+
+    The HNSW index is keyed by a label per row that never changes, so single
+    adds and removals update it in place. It is only rebuilt, on a background
+    thread, after a bulk sync; exact search answers until it is ready.
+    """
+
+    def __init__(self, store, model_name):
+        self.store = store
+        self.model_name = model_name
+        self.ids = []
+        self.hashes = []
+        self.labels = []  # HNSW label of each row
+        self.matrix = None
+        self._rows = None
+        self._filenames = {}  # HNSW label -> filename
+        self._next_label = 0
+
+        self._ann = None
+        self._ann_lock = threading.Lock()  # guards _ann, _building and _ann_updates
+        self._building = False
+        self._ann_failed = False  # not retried until the next bulk sync
+        self._ann_updates = []  # changes made while a build runs, replayed onto it
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _new_label(self, filename):
+        label = self._next_label
+        self._next_label += 1
+        self._filenames[label] = filename
+        return label
+
+    def set_rows(self, ids, hashes, matrix):
+        """Replace every row; the HNSW index is rebuilt in the background."""
+        self.ids = list(ids)
+        self.hashes = list(hashes)
+        self.matrix = matrix
+        self._filenames = {}
+        self._next_label = 0
+        self.labels = [self._new_label(fid) for fid in self.ids]
+        self._rows = None
+        with self._ann_lock:
+            self._ann = None
+            self._ann_failed = False
+            self._ann_updates = []
+        self._start_ann_build()
+
+    def row_of(self, filename):
+        if self._rows is None:
+            self._rows = {fid: i for i, fid in enumerate(self.ids)}
+        return self._rows.get(filename)
+
+    def search(self, query, k=5):
+        """
+        Return up to `k` (row, score) pairs with the highest cosine similarity
+        to the normalized `query` embedding, best first.
+        """
+        return self.search_batch(np.asarray(query).reshape(1, -1), k)[0]
+
+    def search_batch(self, queries, k=5):
+        """search() for each row of `queries`, scored with a single matmul."""
+        n = len(self.ids)
+        if n == 0:
+            return [[] for _ in range(len(queries))]
+        k = min(k, n)
+        queries = np.asarray(queries, dtype=np.float32)
+
+        ann = self._ann if self._use_ann() else None
+        if ann is None:
+            self._start_ann_build()
+        else:
+            try:
+                labels, distances = ann.knn_query(queries, k=k)
+            except RuntimeError:
+                # Too few live elements reachable after many removals
+                labels = None
+            if labels is not None:
+                # cosine space returns 1 - similarity
+                return [
+                    [
+                        (self.row_of(self._filenames[int(label)]), float(1.0 - d))
+                        for label, d in zip(row_labels, row_distances)
+                    ]
+                    for row_labels, row_distances in zip(labels, distances)
+                ]
+
+        # Rows are normalized, so the dot product is the cosine similarity
+        all_scores = queries @ self.matrix.T
+        results = []
+        for scores in all_scores:
+            if k < n:
+                # O(n) partial selection, then sort only the k winners
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(n)
+            top = top[np.argsort(-scores[top])]
+            results.append([(int(i), float(scores[i])) for i in top])
+        return results
+
+    def _use_ann(self):
+        return hnswlib is not None and len(self.ids) >= ANN_THRESHOLD
+
+    def build_ann(self):
+        """Build the HNSW index over the current rows now, on the calling thread."""
+        n, dim = self.matrix.shape
+        print(f"[INFO] Building HNSW index over {n} embeddings")
+        ann = hnswlib.Index(space="cosine", dim=dim)
+        ann.init_index(max_elements=max(n, 1), ef_construction=200, M=16)
+        ann.add_items(np.asarray(self.matrix, dtype=np.float32), np.asarray(self.labels))
+        ann.set_ef(64)
+        with self._ann_lock:
+            self._ann = ann
+            self._ann_updates = []
+
+    def _start_ann_build(self):
+        with self._ann_lock:
+            if self._ann is not None or self._building or self._ann_failed or not self._use_ann():
+                return
+            self._building = True
+            self._ann_updates = []
+        # Snapshot the rows; changes made meanwhile are queued in _ann_updates
+        matrix = np.array(self.matrix, dtype=np.float32)
+        labels = np.asarray(self.labels)
+        threading.Thread(target=self._build_ann, args=(matrix, labels), daemon=True).start()
+
+    def _build_ann(self, matrix, labels):
+        try:
+            n, dim = matrix.shape
+            print(f"[INFO] Building HNSW index over {n} embeddings in the background")
+            ann = hnswlib.Index(space="cosine", dim=dim)
+            ann.init_index(max_elements=n, ef_construction=200, M=16)
+            ann.add_items(matrix, labels)
+            ann.set_ef(64)
+            with self._ann_lock:
+                for update in self._ann_updates:
+                    self._apply_ann_update(ann, *update)
+                self._ann = ann
+        except Exception as e:
+            print("[WARN] Failed to build HNSW index:", e)
+            with self._ann_lock:
+                self._ann_failed = True
+        finally:
+            with self._ann_lock:
+                self._building = False
+                self._ann_updates = []
+
+    def _apply_ann_update(self, ann, label, vector):
+        # vector is None for a removal
+        if vector is None:
+            ann.mark_deleted(label)
+            return
+        if ann.get_current_count() >= ann.get_max_elements():
+            ann.resize_index(max(16, ann.get_max_elements() * 2))
+        ann.add_items(vector.reshape(1, -1), [label])
+
+    def _update_ann(self, label, vector=None):
+        with self._ann_lock:
+            if self._ann is not None:
+                self._apply_ann_update(self._ann, label, vector)
+            elif self._building:
+                self._ann_updates.append((label, vector))
+        # An add can take the index over the threshold
+        self._start_ann_build()
+
+    def sync(self, descriptions, encode):
+        """
+        Bring the index in line with `descriptions` ({filename: description}).
+        Embeddings are reused from memory or the store where the description
+        is unchanged; only the rest are encoded.
+        """
+        wanted = {filename: text_hash(desc) for filename, desc in descriptions.items()}
+        current = dict(zip(self.ids, self.hashes))
+        if current == wanted and self.matrix is not None:
+            return
+
+        keep = [i for i, (fid, h) in enumerate(zip(self.ids, self.hashes)) if wanted.get(fid) == h]
+        kept_ids = {self.ids[i] for i in keep}
+        missing = [fid for fid in descriptions if fid not in kept_ids]
+
+        stored = self.store.get_embeddings(self.model_name, missing)
+        reuse = [fid for fid in missing if fid in stored and stored[fid][0] == wanted[fid]]
+        reused = set(reuse)
+        to_encode = [fid for fid in missing if fid not in reused]
+        print(f"[INFO] Embedding index: {len(keep) + len(reuse)} cached, {len(to_encode)} to encode")
+
+        parts = []
+        if keep:
+            parts.append(self.matrix[keep])
+        if reuse:
+            parts.append(np.stack([stored[fid][1] for fid in reuse]))
+        if to_encode:
+            vectors = encode([descriptions[fid] for fid in to_encode])
+            self.store.put_embeddings(
+                self.model_name, [(fid, wanted[fid], v) for fid, v in zip(to_encode, vectors)]
+            )
+            parts.append(vectors)
+
+        ids = [self.ids[i] for i in keep] + reuse + to_encode
+        if parts:
+            matrix = np.ascontiguousarray(np.vstack(parts), dtype=np.float32)
+        else:
+            matrix = np.empty((0, 0), dtype=np.float32)
+        self.set_rows(ids, [wanted[fid] for fid in ids], matrix)
+
+    def add(self, filename, description, encode):
+        embedding = encode([description])
+        h = text_hash(description)
+        self.store.put_embeddings(self.model_name, [(filename, h, embedding[0])])
+
+        i = self.row_of(filename)
+        if i is not None:
+            self.matrix[i] = embedding[0]
+            self.hashes[i] = h
+        else:
+            i = len(self.ids)
+            self.ids.append(filename)
+            self.hashes.append(h)
+            self.labels.append(self._new_label(filename))
+            if self.matrix is None or len(self.matrix) == 0:
+                self.matrix = np.asarray(embedding, dtype=np.float32)
+            else:
+                self.matrix = np.vstack([self.matrix, embedding])
+            self._rows[filename] = i
+        # Re-adding an existing label replaces its vector
+        self._update_ann(self.labels[i], self.matrix[i])
+
+    def remove(self, filename):
+        # The stored vector stays with the asset row, in case the file comes back
+        i = self.row_of(filename)
+        if i is None:
+            return
+        label = self.labels[i]
+        del self.ids[i]
+        del self.hashes[i]
+        del self.labels[i]
+        del self._filenames[label]
+        self.matrix = np.delete(self.matrix, i, axis=0)
+        # Later rows moved up; the lookup table is rebuilt on next use
+        self._rows = None
+        self._update_ann(label)
@@ -1,14 +1,23 @@
 import os
-import subprocess
 import sys
 import json
 import shutil
+import hashlib
 import importlib
 import pkgutil
 from utils import get_viewer_assets, get_models_dir
 
 viewer_assets_dir = get_viewer_assets()
 
+# Rough peak memory of one TripoSR forward pass + marching cubes at the default
+# chunk size. Used to size batches to the memory actually available.
+TRIPOSR_BYTES_PER_IMAGE = 3 * 1024 ** 3
+MAX_BATCH_SIZE = 8
+
+FOREGROUND_RATIO = 0.85
+# Bump when preprocess_image changes so stale cache entries are ignored
+PREPROCESS_VERSION = 1
+
 def alias_package_tree(src_pkg_name: str, alias_root: str) -> None:
     """
     Make everything under `src_pkg_name` importable as `alias_root`.
@@ -30,37 +39,164 @@ def alias_package_tree(src_pkg_name: str, alias_root: str) -> None:
             except Exception:
                 pass
 
-def run_triposr(image_path, model_path, output_dir):
+def ensure_tsr_importable():
     # checks whether running from Nuitka build or in dev
     is_frozen = "__compiled__" in globals() or getattr(sys, "frozen", False)
 
+    try:
+        importlib.import_module("tsr")
+        return
+    except ImportError:
+        pass
+
     if is_frozen:
         # If there is no top-level 'tsr', alias the whole TripoSR.tsr tree to 'tsr'
-        try:
-            importlib.import_module("tsr")
-        except ImportError:
-            alias_package_tree("TripoSR.tsr", "tsr")
+        alias_package_tree("TripoSR.tsr", "tsr")
+    else:
+        # Same layout TripoSR/run.py expects: 'tsr' lives directly under TripoSR/
+        sys.path.insert(0, os.path.abspath("TripoSR"))
+
+def determine_device():
+    import torch
+    if torch.cuda.is_available():
+        return "cuda:0"
+    return "cpu"
+
+def available_memory(device: str) -> int | None:
+    if device.startswith("cuda"):
+        import torch
+        free, _ = torch.cuda.mem_get_info()
+        return free
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.virtual_memory().available
+
+def batch_size_for(device: str, num_images: int, requested: int | None = None) -> int:
+    if requested:
+        return max(1, min(int(requested), num_images))
+
+    free = available_memory(device)
+    if free is None:
+        return 1
+    size = free // TRIPOSR_BYTES_PER_IMAGE
+    return max(1, min(size, MAX_BATCH_SIZE, num_images))
+
+def load_triposr(model_path, device, chunk_size=8192):
+    ensure_tsr_importable()
+    from tsr.system import TSR
+
+    print(f"[INFO] Loading TripoSR: {model_path} (device={device})", flush=True)
+    model = TSR.from_pretrained(
+        model_path,
+        config_name="config.yaml",
+        weight_name="model.ckpt",
+    )
+    model.renderer.set_chunk_size(chunk_size)
+    model.to(device)
+    return model
+
+def preprocess_image(image_path, rembg_session, foreground_ratio=FOREGROUND_RATIO):
+    # Same foreground removal / crop / grey background as TripoSR/run.py
+    import numpy as np
+    from PIL import Image
+    from tsr.utils import remove_background, resize_foreground
+
+    image = remove_background(Image.open(image_path), rembg_session)
+    image = resize_foreground(image, foreground_ratio)
+    image = np.array(image).astype(np.float32) / 255.0
+    image = image[:, :, :3] * image[:, :, 3:4] + (1 - image[:, :, 3:4]) * 0.5
+    return Image.fromarray((image * 255.0).astype(np.uint8))
+
+def preprocess_cache_key(image_path, foreground_ratio=FOREGROUND_RATIO):
+    h = hashlib.sha256()
+    with open(image_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    params = {"foreground_ratio": foreground_ratio, "version": PREPROCESS_VERSION}
+    h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+def load_preprocessed(image_path, cache_dir, get_rembg_session, foreground_ratio=FOREGROUND_RATIO):
+    """
+    Return the preprocessed image for `image_path`, reusing a cached copy in
+    `cache_dir` when the same source image and parameters were seen before.
+    `get_rembg_session` is only called on a cache miss.
+    """
+    from PIL import Image
 
-        argv_backup = sys.argv[:]
+    key = preprocess_cache_key(image_path, foreground_ratio)
+    cache_path = os.path.join(cache_dir, key + ".png")
+    if os.path.exists(cache_path):
         try:
-            sys.argv = [
-                "TripoSR.run",
-                image_path,
-                "--pretrained-model-name-or-path", model_path,
-                "--output-dir", output_dir,
-            ]
-            importlib.import_module("TripoSR.run")
-        finally:
-            sys.argv = argv_backup
-    else:
-        run_script = os.path.abspath(os.path.join("TripoSR", "run.py"))
-        subprocess.run([
-            sys.executable,
-            run_script,
-            image_path,
-            "--pretrained-model-name-or-path", model_path,
-            "--output-dir", output_dir
-        ], check=True)
+            image = Image.open(cache_path)
+            image.load()
+            print(f"[INFO] Preprocess cache hit: {image_path}", flush=True)
+            return image
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable cache entry {cache_path}: {e}", flush=True)
+
+    image = preprocess_image(image_path, get_rembg_session(), foreground_ratio)
+
+    # Write then rename so a crash never leaves a truncated entry behind
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    image.save(tmp_path, format="PNG")
+    os.replace(tmp_path, cache_path)
+    return image
+
+def run_triposr(image_paths, model_path, output_dir, batch_size=None, mc_resolution=256,
+                foreground_ratio=FOREGROUND_RATIO):
+    """
+    Reconstruct every image in `image_paths` with a single model load.
+    Image i is written to `output_dir/<i>/mesh.obj`, matching TripoSR/run.py.
+    """
+    import torch
+
+    device = determine_device()
+    model = load_triposr(model_path, device)
+    cache_dir = os.path.join(output_dir, "preprocess_cache")
+
+    # rembg is only needed for images missing from the preprocess cache
+    rembg_session = None
+    def get_rembg_session():
+        nonlocal rembg_session
+        if rembg_session is None:
+            import rembg
+            rembg_session = rembg.new_session()
+        return rembg_session
+
+    batch_size = batch_size_for(device, len(image_paths), batch_size)
+    print(f"[INFO] Reconstructing {len(image_paths)} image(s), batch size {batch_size}", flush=True)
+
+    mesh_paths = []
+    for start in range(0, len(image_paths), batch_size):
+        batch = image_paths[start:start + batch_size]
+
+        images = []
+        for i, image_path in enumerate(batch, start):
+            image_dir = os.path.join(output_dir, str(i))
+            os.makedirs(image_dir, exist_ok=True)
+            image = load_preprocessed(image_path, cache_dir, get_rembg_session, foreground_ratio)
+            image.save(os.path.join(image_dir, "input.png"))
+            images.append(image)
+
+        with torch.no_grad():
+            scene_codes = model(images, device=device)
+        meshes = model.extract_mesh(scene_codes, True, resolution=mc_resolution)
+
+        for i, mesh in enumerate(meshes, start):
+            mesh_path = os.path.join(output_dir, str(i), "mesh.obj")
+            mesh.export(mesh_path)
+            mesh_paths.append(mesh_path)
+            print(f"[OK] Mesh {i + 1}/{len(image_paths)} → {mesh_path}", flush=True)
+
+        del scene_codes, meshes
+        if device.startswith("cuda"):
+            torch.cuda.empty_cache()
+
+    return mesh_paths
 
 
 def main():
@@ -76,34 +212,46 @@ def main():
     with open(input_json, "r") as f:
         input_data = json.load(f)
 
-    image_path = input_data.get("image_path")
-    if not image_path or not os.path.exists(image_path):
-        print(f"[ERROR] Invalid or missing image path: {image_path}", flush=True)
+    # Accept either a single "image_path" or a list of "image_paths"
+    image_paths = input_data.get("image_paths")
+    if image_paths is None:
+        image_paths = [input_data.get("image_path")]
+    if not image_paths:
+        print("[ERROR] No images given in input JSON.", flush=True)
         sys.exit(1)
+    for image_path in image_paths:
+        if not image_path or not os.path.exists(image_path):
+            print(f"[ERROR] Invalid or missing image path: {image_path}", flush=True)
+            sys.exit(1)
 
     model_path = os.path.join(get_models_dir(), "TripoSR")
 
     asset_output_dir = os.path.join(viewer_assets_dir, "output")
     os.makedirs(asset_output_dir, exist_ok=True)
 
-    asset_path = os.path.join(asset_output_dir, "0", "mesh.obj")
-
-    print(f"Running TripoSR with image {image_path} → {asset_output_dir}", flush=True)
+    print(f"Running TripoSR with {len(image_paths)} image(s) → {asset_output_dir}", flush=True)
 
     try:
-        run_triposr(image_path, model_path, asset_output_dir)
+        mesh_paths = run_triposr(
+            image_paths,
+            model_path,
+            asset_output_dir,
+            batch_size=input_data.get("batch_size"),
+            mc_resolution=int(input_data.get("mc_resolution", 256)),
+            foreground_ratio=float(input_data.get("foreground_ratio", FOREGROUND_RATIO)),
+        )
 
-        if os.path.exists(asset_path):
+        if mesh_paths and os.path.exists(mesh_paths[0]):
             final_path = os.path.join(viewer_assets_dir, "generated_model.obj")
             try:
                 if os.path.exists(final_path):
                     os.remove(final_path)
-                shutil.copy(asset_path, final_path)
+                shutil.copy(mesh_paths[0], final_path)
             except Exception as copy_err:
                 print(f"[ERROR] Failed to copy model: {copy_err}", flush=True)
 
             with open(output_json, "w") as f:
-                json.dump({"model_path": final_path}, f)
+                json.dump({"model_path": final_path, "model_paths": mesh_paths}, f)
         else:
             print("Model file not found after generation.", flush=True)
             with open(output_json, "w") as f:
@@ -0,0 +1,100 @@
+import os
+import re
+
+# Words that carry no meaning for asset lookup ("a 3D model of a lion" -> "lion")
+STOP_WORDS = {"a", "an", "the", "of", "and", "with", "for", "3d", "model", "models", "show", "me", "some"}
+
+def tokenize(text):
+    tokens = re.findall(r"[a-z0-9]+", text.lower())
+    return [t for t in tokens if t not in STOP_WORDS]
+
+def trigrams(tokens):
+    grams = set()
+    for token in tokens:
+        padded = f" {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def filename_phrase(filename):
+    return os.path.splitext(filename)[0].replace("_", " ").replace("-", " ")
+
+class LexicalIndex:
+    """
+    Token and character-trigram inverted indexes over asset filenames and
+    descriptions. Cheap to build (no model needed), so it answers exact or
+    near-exact queries before and instead of the sentence encoder.
+    """
+
+    def __init__(self):
+        self.exact = {}       # normalized phrase -> set of filenames
+        self.token_index = {}  # token -> set of filenames
+        self.gram_index = {}   # trigram -> set of filenames
+        self.docs = {}        # filename -> (phrases, tokens, trigrams)
+
+    def build(self, descriptions):
+        self.exact, self.token_index, self.gram_index, self.docs = {}, {}, {}, {}
+        for filename, description in descriptions.items():
+            self.add(filename, description)
+
+    def add(self, filename, description):
+        self.remove(filename)
+
+        # Filename stem, the full description and each comma separated alias
+        fields = [filename_phrase(filename), description] + description.split(",")
+        phrases = {" ".join(tokenize(f)) for f in fields}
+        phrases.discard("")
+        tokens = set(tokenize(" ".join(fields)))
+        grams = trigrams(tokens)
+
+        self.docs[filename] = (phrases, tokens, grams)
+        for phrase in phrases:
+            self.exact.setdefault(phrase, set()).add(filename)
+        for token in tokens:
+            self.token_index.setdefault(token, set()).add(filename)
+        for gram in grams:
+            self.gram_index.setdefault(gram, set()).add(filename)
+
+    def remove(self, filename):
+        if filename not in self.docs:
+            return
+        phrases, tokens, grams = self.docs.pop(filename)
+        for table, keys in ((self.exact, phrases), (self.token_index, tokens), (self.gram_index, grams)):
+            for key in keys:
+                postings = table.get(key)
+                if postings is not None:
+                    postings.discard(filename)
+                    if not postings:
+                        del table[key]
+
+    def exact_match(self, query):
+        """The single filename whose name or description equals `query`, else None."""
+        hits = self.exact.get(" ".join(tokenize(query)))
+        if hits and len(hits) == 1:
+            return next(iter(hits))
+        return None
+
+    def search(self, query, k=10):
+        """
+        Up to `k` (filename, score) pairs, score in [0, 1]: the mean of
+        query-token coverage and query-trigram coverage.
+        """
+        q_tokens = set(tokenize(query))
+        q_grams = trigrams(q_tokens)
+        if not q_grams:
+            return []
+
+        candidates = set()
+        for token in q_tokens:
+            candidates |= self.token_index.get(token, set())
+        for gram in q_grams:
+            candidates |= self.gram_index.get(gram, set())
+
+        scored = []
+        for filename in candidates:
+            _, tokens, grams = self.docs[filename]
+            token_score = len(q_tokens & tokens) / len(q_tokens)
+            gram_score = len(q_grams & grams) / len(q_grams)
+            scored.append((filename, 0.5 * token_score + 0.5 * gram_score))
+
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:k]
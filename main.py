@@ -27,13 +27,17 @@ from PySide6.QtCore import Qt, QTimer, QPropertyAnimation, QRect, QEvent, QUrl
 from PySide6.QtGui import QFont, QIcon
 from pipeline import Pipeline
 from audio_recorder import AudioRecorder
+from transcription_service import TranscriptionService, StreamingTranscriber
 from model_viewer import ModelViewer
+from asset_scheme import register_asset_scheme
+from asset_optimizer import import_asset, lod_path_for
 from model_selector import ModelSelector
-from utils import get_app_dir, get_data_dir, get_viewer_assets, get_models_dir, get_icons_dir
-import os, sys, multiprocessing, shutil
+from model_gallery import ModelGalleryDialog, ThumbnailCache
+from utils import get_data_dir, get_viewer_assets, get_models_dir, get_icons_dir
+import os, sys, multiprocessing
+import threading
 import time
 import contextlib
-import json
 
 def is_flux(model_name: str) -> bool:
     return "flux" in (model_name or "").lower()
@@ -197,12 +201,28 @@ class MainWindow(QMainWindow):
         self.record_btn.setIcon(QIcon(os.path.join(get_icons_dir(), "mic.svg")))
         self.record_btn.setFixedWidth(100)
         self.is_recording = False
-        self.audio_recorder = AudioRecorder()
+        # stop after 1.5s pause; audio goes to the transcriber in memory, not via a WAV file
+        self.audio_recorder = AudioRecorder(auto_stop_after=1.5, save_wav=False)
         self.record_btn.clicked.connect(self.toggle_recording)
 
+        # Resident whisper server, loads its model while the window starts up
+        self.transcriber = TranscriptionService(self.audio_recorder.samplerate)
+        self.transcriber.start()
+
+        # Live partial transcripts while recording
+        self.streamer = StreamingTranscriber(self.transcriber, self.audio_recorder.samplerate)
+        self.partial_timer = QTimer()
+        self.partial_timer.timeout.connect(self.update_partial_text)
+
+        # The tail of a recording is transcribed on a background thread
+        self.transcription_result = None  # ("text", text) or ("error", exception) once done
+        self.transcription_timer = QTimer()
+        self.transcription_timer.timeout.connect(self.check_transcription)
+
         self.text_input = QLineEdit()
         self.text_input.setPlaceholderText("e.g., 3D model of a dinosaur")
         self.text_input.setMinimumWidth(240)
+        self.text_input.textChanged.connect(self.on_text_changed)
 
         self.search_btn = QPushButton("")
         self.search_btn.setToolTip("Search for a model using the typed description")
@@ -247,6 +267,7 @@ class MainWindow(QMainWindow):
             # Exclude non-diffusion models
             if name != ".DS_Store"
             and name != "all-MiniLM-L6-v2"
+            and name != "all-MiniLM-L6-v2-onnx"
             and name != "TripoSR"
         ]
         self.model_dropdown.addItems(models)
@@ -326,6 +347,13 @@ class MainWindow(QMainWindow):
         self.show_models_btn.setIcon(QIcon(os.path.join(get_icons_dir(), "list.svg")))
         self.show_models_btn.clicked.connect(self.show_models_dialog)
 
+        # Saved and imported models are optimized on a background thread
+        self.import_result = None  # ("ok", filename, path) or ("error", exception) once done
+        self.import_timer = QTimer()
+        self.import_timer.timeout.connect(self.check_import)
+        self.import_messages = None  # (done, failed) message prefixes of the running import
+        self.import_show = False  # load the model into the viewer once imported
+
         # Button bar
         button_bar_2 = QWidget()
         bbx = QHBoxLayout(button_bar_2)
@@ -350,9 +378,22 @@ class MainWindow(QMainWindow):
 
         # Viewer/selector setup
         self.viewer = ModelViewer()
-        self.selector = ModelSelector()
+        self.viewer.model_loaded.connect(self.on_viewer_loaded)
+        self.viewer.model_load_failed.connect(self.on_viewer_load_failed)
+        self.generated_model_pending = None  # generated model the total time is waiting for
+        self.thumbnails = ThumbnailCache(os.path.join(get_viewer_assets(), "thumbnails"), self.viewer)
+        self.selector = ModelSelector()  # loads its model on a background thread
         self.current_model_path = None
 
+        # Text query waiting for the selector to finish loading
+        self.pending_query = None
+        self.selector_timer = QTimer()
+        self.selector_timer.timeout.connect(self.check_selector_ready)
+
+        # Likely matches for the text being typed, prefetched into the viewer
+        self.prefetch_timer = QTimer()
+        self.prefetch_timer.timeout.connect(self.check_predictions)
+
         # Prevent buttons from grabbing keyboard focus so Space/Enter won't click them
         for btn in [
             self.record_btn, 
@@ -608,43 +649,103 @@ class MainWindow(QMainWindow):
     # Turn recording on and off
     def toggle_recording(self):
         if not self.is_recording:
+            self.streamer.start()
+            self.audio_recorder.on_audio = self.streamer.feed
+            try:
+                # The UI only switches to recording once the input device is open
+                self.audio_recorder.start()
+            except Exception as e:
+                self.audio_recorder.on_audio = None
+                self.streamer.cancel()
+                self.message.setText("Could not start recording.")
+                print("[ERROR] Failed to start recording:", e)
+                return
             self.is_recording = True
-            self.instruction_label.setText("Recording... Click again to stop.")
+            self.instruction_label.setText("Recording... Pause or click again to stop.")
             self.record_btn.setText("Stop")
             self.record_btn.setIcon(QIcon())
-            self.audio_recorder.start()
+            self.partial_timer.start(200)
         else:
             self.is_recording = False
+            self.partial_timer.stop()
             self.instruction_label.setText("Describe a 3D model by speaking or typing")
             self.record_btn.setText("")
             self.record_btn.setIcon(QIcon(os.path.join(get_icons_dir(), "mic.svg")))
             self.audio_recorder.stop()
+            self.audio_recorder.on_audio = None
+
+            # No new recording until this one is transcribed
+            self.record_btn.setEnabled(False)
+            self.message.setText("Transcribing...")
+            self.transcription_result = None
+            threading.Thread(
+                target=self.transcribe_recording,
+                args=(self.audio_recorder.audio_data, self.audio_recorder.filename),
+                daemon=True,
+            ).start()
+            self.transcription_timer.start(100)
+
+    # runs on a background thread; check_transcription picks up the result
+    def transcribe_recording(self, audio_data, audio_path):
+        try:
+            # Most of the audio is already transcribed; only the tail is left
+            text = self.streamer.finish()
+            if text is None:
+                # Uses the resident whisper server, or the transcribe executable as a fallback
+                text = self.transcriber.transcribe(audio_data=audio_data, audio_path=audio_path)
+            self.transcription_result = ("text", text)
+        except Exception as e:
+            self.transcription_result = ("error", e)
 
-            try:
-                base_path = get_app_dir() # Determine base path to main executable
-                self.transcribe_exe = os.path.join(base_path, "transcribe.exe") # Transcribe executable next to main executable
-
-                if not os.path.exists(self.transcribe_exe):
-                    print("[ERROR] Transcribe executable needs to be in the same folder as the main app.") 
+    def check_transcription(self):
+        result = self.transcription_result
+        if result is None:
+            return
+        self.transcription_timer.stop()
+        self.transcription_result = None
+        self.record_btn.setEnabled(True)
+
+        kind, text = result
+        if kind == "error":
+            self.message.setText("Error processing audio.")
+            print("[ERROR]", text)
+            return
+        if not text:
+            self.message.setText("Transcription failed.")
+            return
 
-                audio_path = self.audio_recorder.filename
-                transcribe_input = {"audio_path": audio_path}
-                transcribe_output = Pipeline.run_stage(self.transcribe_exe, transcribe_input)
-                text = transcribe_output.get("transcription")
+        self.message.setText(text)
+        if self.is_generate_mode():
+            self.generate_model(text)
+        else:
+            self.load_model_from_text(text)
 
-                if not text:
-                    self.message.setText("Transcription failed.")
-                    return
+    # show partial transcript while still recording
+    def update_partial_text(self):
+        # recorder heard a long enough pause after speech
+        if self.is_recording and self.audio_recorder.auto_stop_requested:
+            self.toggle_recording()
+            return
 
-                self.message.setText(text)
-                if self.is_generate_mode():
-                    self.generate_model(text)
-                else:
-                    self.load_model_from_text(text)
+        text = self.streamer.partial_text
+        if text:
+            self.instruction_label.setText(f"{text} ...")
 
-            except Exception as e:
-                self.message.setText("Error processing audio.")
-                print("[ERROR]", e)
+    # look up likely matches while the user types (load mode only)
+    def on_text_changed(self, text):
+        if self.is_generate_mode() or not text.strip():
+            return
+        self.selector.predict_later(text)
+        self.prefetch_timer.start(100)
+
+    # prefetch the models the typed text is likely to load
+    def check_predictions(self):
+        result = self.selector.take_predictions()
+        if result:
+            for model_file in result[1]:
+                self.viewer.prefetch_model(model_file)
+        if not self.selector.prediction_pending():
+            self.prefetch_timer.stop()
 
     # text input
     def handle_text_input(self):
@@ -660,6 +761,13 @@ class MainWindow(QMainWindow):
 
     # Load from text
     def load_model_from_text(self, text):
+        if not self.selector.can_answer_now(text):
+            # answered by check_selector_ready once the model has loaded
+            self.pending_query = text
+            self.message.setText(f"{text} (loading search model...)")
+            self.selector_timer.start(100)
+            return
+
         model_file, score = self.selector.get_best_match(text)
         if model_file:
             # self.message.setText(f"{text} (matched: {model_file}, score={score:.2f})")
@@ -669,6 +777,15 @@ class MainWindow(QMainWindow):
         else:
             self.message.setText(f"{text} (no model match)")
 
+    # run a query that arrived before the selector finished loading
+    def check_selector_ready(self):
+        if not self.selector.is_ready():
+            return
+        self.selector_timer.stop()
+        text, self.pending_query = self.pending_query, None
+        if text:
+            self.load_model_from_text(text)
+
     # Model generation
     def generate_model(self, text):
         self._start_time = time.time()
@@ -688,17 +805,42 @@ class MainWindow(QMainWindow):
             result = pipe.run_pipeline(text, model_name, cfg)
 
             self.message.setText(f"3D asset for: {result['text']}")
-            self.viewer.load_model(result['model'])
             self.current_model_path = result['model']
-
-            total_time = time.time() - self._start_time
-            self.timer_label.setText(f"Total time: {total_time:.2f} seconds")
+            # Total time is shown by on_viewer_loaded, once the model is on screen
+            self.generated_model_pending = result['model']
+            self.viewer.load_model(result['model'])
         except Exception as e:
             self.message.setText("Pipeline failed")
             self.timer_label.setText("")
-            print("[ERROR]", e)
-        finally:
             self.elapsed_timer.stop()
+            print("[ERROR]", e)
+
+    # viewer has drawn a model
+    def on_viewer_loaded(self, path, timings):
+        print(
+            f"[INFO] Viewer loaded {os.path.basename(path)}: "
+            f"parse {timings.get('parseMs', 0):.0f} ms, "
+            f"first render {timings.get('firstRenderMs', 0):.0f} ms, "
+            f"total {timings.get('totalMs', 0):.0f} ms"
+        )
+        if path != self.generated_model_pending:
+            return
+        self.generated_model_pending = None
+        self.elapsed_timer.stop()
+        total_time = time.time() - self._start_time
+        self.timer_label.setText(f"Total time: {total_time:.2f} seconds")
+
+    def on_viewer_load_failed(self, path, error):
+        superseded = error == "superseded"  # another model was loaded before this one finished
+        if not superseded:
+            print(f"[ERROR] Viewer failed to load {path}: {error}")
+        if path != self.generated_model_pending:
+            return
+        self.generated_model_pending = None
+        self.elapsed_timer.stop()
+        if not superseded:
+            self.message.setText("Failed to display the generated model.")
+        self.timer_label.setText("")
 
     # timer for model generation
     def update_timer(self):
@@ -726,22 +868,13 @@ class MainWindow(QMainWindow):
         if not filename.lower().endswith(".obj"):
             filename += ".obj"
 
-        try:
-            download_dir = os.path.join(get_viewer_assets(), "3d_assets")
-            os.makedirs(download_dir, exist_ok=True)
-
-            dest_path = os.path.join(download_dir, filename)
-            shutil.copy(self.current_model_path, dest_path)
-
-            description, ok = QInputDialog.getText(self, "Model Description", "Enter description for the uploaded model:")
-            if ok and description.strip():
-                self.selector.add_model(filename, description.strip())
-                self.message.setText(f"Saved: {filename}")
-            else:
-                self.message.setText("Save canceled: No description entered.")
+        description, ok = QInputDialog.getText(self, "Model Description", "Enter description for the uploaded model:")
+        if not ok or not description.strip():
+            self.message.setText("Save canceled: No description entered.")
+            return
 
-        except Exception as e:
-            self.message.setText(f"Error saving file: {str(e)}")
+        self.message.setText("Saving...")
+        self.start_import(self.current_model_path, filename, description.strip(), ("Saved", "Error saving file"), False)
 
     # Delete a loaded model
     def handle_delete(self):
@@ -753,6 +886,9 @@ class MainWindow(QMainWindow):
             filename = os.path.basename(self.current_model_path)
 
             os.remove(self.current_model_path)
+            lod_path = lod_path_for(self.current_model_path)
+            if os.path.isfile(lod_path):
+                os.remove(lod_path)
             self.selector.remove_model(filename)
 
             self.viewer.clear_model()
@@ -771,88 +907,91 @@ class MainWindow(QMainWindow):
         )
 
         if file_path and os.path.isfile(file_path):
-            filename = os.path.basename(file_path)
-
-            # Copy file to viewer_assets directory
-            try:
-                upload_dir = os.path.join(get_viewer_assets(), "3d_assets")
-                dest_path = os.path.join(upload_dir, filename)
-                with open(file_path, "rb") as src, open(dest_path, "wb") as dst:
-                    dst.write(src.read())
-            except Exception as e:
-                self.message.setText(f"Error saving file: {str(e)}")
-                return
-
             # Ask user for description
             description, ok = QInputDialog.getText(self, "Model Description", "Enter description for the uploaded model:")
-            if ok and description.strip():
-                self.selector.add_model(filename, description.strip())
-                self.message.setText(f"Uploaded: {filename}")
-                self.viewer.load_model(dest_path)
-            else:
+            if not ok or not description.strip():
                 self.message.setText("Upload canceled: No description entered.")
+                return
+
+            # Store an optimized copy in the viewer_assets directory
+            self.message.setText("Importing...")
+            self.start_import(file_path, None, description.strip(), ("Uploaded", "Error saving file"), True)
         else:
             self.message.setText("No valid file selected.")
 
-    # load 3D model descriptions from json file
+    def start_import(self, src_path, filename, description, messages, show):
+        # One import at a time, so two never pick the same free filename
+        self.import_btn.setEnabled(False)
+        self.save_del_btn.setEnabled(False)
+        self.import_messages = messages
+        self.import_show = show
+        self.import_result = None
+        threading.Thread(
+            target=self.import_model, args=(src_path, filename, description), daemon=True
+        ).start()
+        self.import_timer.start(100)
+
+    # runs on a background thread; check_import picks up the result
+    def import_model(self, src_path, filename, description):
+        try:
+            assets_dir = os.path.join(get_viewer_assets(), "3d_assets")
+            # Stored as a compact GLB, so the name may change from .obj to .glb
+            filename = import_asset(src_path, assets_dir, filename)
+            # Encoding the description waits for the search model to load
+            self.selector.add_model(filename, description)
+            self.import_result = ("ok", filename, os.path.join(assets_dir, filename))
+        except Exception as e:
+            self.import_result = ("error", e)
+
+    def check_import(self):
+        result = self.import_result
+        if result is None:
+            return
+        self.import_timer.stop()
+        self.import_result = None
+        self.import_btn.setEnabled(True)
+        self.save_del_btn.setEnabled(True)
+
+        done, failed = self.import_messages
+        if result[0] == "error":
+            self.message.setText(f"{failed}: {str(result[1])}")
+            return
+        _, filename, path = result
+        self.message.setText(f"{done}: {filename}")
+        if self.import_show:
+            self.viewer.load_model(path)
+
+    # 3D model descriptions, cached in memory by the selector's asset store
     def load_model_descriptions(self) -> dict:
         try:
-            json_path = os.path.join(get_viewer_assets(), "model_descriptions.json")
-            if os.path.exists(json_path):
-                with open(json_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, dict):
-                        return data
+            return self.selector.model_descriptions
         except Exception as e:
-            print("[WARN] Could not read model_descriptions.json:", e)
+            print("[WARN] Could not read asset descriptions:", e)
 
-    # show names and descriptions of 3D models
+    # thumbnail gallery of saved 3D models, filtered as you type
     def show_models_dialog(self):
         entries = self.load_model_descriptions()
         if not entries:
             QMessageBox.information(self, "Saved Models", "No saved models found.")
             return
 
-        rows = []
-        rows.append("<table style='width:100%; border-collapse:collapse;'>")
-        rows.append("<thead><tr>"
-                    "<th style='text-align:left; border-bottom:1px solid #888; padding:4px;'>Filename</th>"
-                    "<th style='text-align:left; border-bottom:1px solid #888; padding:4px;'>Description</th>"
-                    "</tr></thead><tbody>")
-        for filename, desc in sorted(entries.items(), key=lambda kv: kv[0].lower()):
-            safe_name = self._escape_html(filename)
-            safe_desc = self._escape_html(desc) if desc else "<i>(no description)</i>"
-            rows.append(
-                f"<tr>"
-                f"<td style='padding:4px; vertical-align:top;'>{safe_name}</td>"
-                f"<td style='padding:4px; vertical-align:top;'>{safe_desc}</td>"
-                f"</tr>"
-            )
-        rows.append("</tbody></table>")
-        html = "\n".join(rows)
-
-        dlg = QDialog(self)
-        dlg.setWindowTitle("Saved 3D Models")
-        dlg.resize(360, 480)
-
-        v = QVBoxLayout(dlg)
-        browser = QTextBrowser(dlg)
-        browser.setHtml(html)
-        v.addWidget(browser)
-
-        buttons = QDialogButtonBox(QDialogButtonBox.Close, parent=dlg)
-        buttons.rejected.connect(dlg.reject)
-        v.addWidget(buttons)
-
+        dlg = ModelGalleryDialog(self.selector, self.thumbnails, self)
+        dlg.asset_activated.connect(self.load_library_model)
         dlg.exec()
 
-    def _escape_html(self, s: str) -> str:
-        """Very small HTML escaper for filenames/descriptions."""
-        return (
-            s.replace("&", "&amp;")
-                .replace("<", "&lt;")
-                .replace(">", "&gt;")
-        )
+    # show a model picked from the gallery
+    def load_library_model(self, filename):
+        if self.is_generate_mode():
+            self.set_mode("Load")
+        model_file = os.path.join(self.selector.assets_dir, filename)
+        self.viewer.load_model(model_file)
+        self.current_model_path = model_file
+        self.message.setText(os.path.splitext(filename)[0])
+
+    def closeEvent(self, event):
+        self.transcriber.stop()
+        self.selector.stop_watching()
+        super().closeEvent(event)
 
 
 def load_stylesheet(filename):
@@ -862,6 +1001,7 @@ def load_stylesheet(filename):
 
 if __name__ == '__main__':
     multiprocessing.freeze_support()
+    register_asset_scheme()
     app = QApplication(sys.argv)
     style_sheet = os.path.join(get_data_dir(), "style.qss")
     app.setStyleSheet(load_stylesheet(style_sheet))
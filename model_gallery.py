@@ -0,0 +1,348 @@
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QLineEdit,
+    QListView,
+    QLabel,
+    QDialogButtonBox,
+)
+from PySide6.QtCore import (
+    Qt,
+    QObject,
+    Signal,
+    QSize,
+    QAbstractListModel,
+    QModelIndex,
+    QSortFilterProxyModel,
+    QTimer,
+)
+from PySide6.QtGui import QPixmap, QColor
+from asset_store import file_hash
+from collections import OrderedDict, defaultdict
+import os
+import threading
+
+THUMBNAIL_SIZE = 160
+# A render that has not answered by then is treated as failed
+RENDER_TIMEOUT_MS = 15000
+
+class ThumbnailCache(QObject):
+    """
+    PNG thumbnails of library assets, stored on disk as <file hash>.png so
+    each asset is rendered once, and again only if its contents change.
+    Missing thumbnails are rendered offscreen by the viewer, one at a time,
+    newest request first so rows scrolled into view are drawn before rows
+    that have already scrolled past.
+    """
+
+    thumbnail_ready = Signal(str)  # file hash
+
+    def __init__(self, cache_dir, viewer, size=THUMBNAIL_SIZE, max_pixmaps=512, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.viewer = viewer
+        self.size = size
+        self.max_pixmaps = max_pixmaps
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._pixmaps = OrderedDict()  # file hash -> QPixmap, LRU
+        self._queue = OrderedDict()  # file hash -> asset path, waiting to render
+        self._rendering = None  # (file hash, asset path) being rendered
+        self._failed = set()  # not retried until the app restarts
+
+        self._render_timer = QTimer(self)
+        self._render_timer.setSingleShot(True)
+        self._render_timer.timeout.connect(self._on_render_timeout)
+
+        viewer.thumbnail_ready.connect(self._on_rendered)
+        viewer.thumbnail_failed.connect(self._on_failed)
+        # A page reload drops the render in progress; ask for it again
+        viewer.loadStarted.connect(self._on_page_reload)
+
+    def path_for(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.png")
+
+    def pixmap(self, digest, asset_path):
+        """The thumbnail for `digest`, or None if it still has to be rendered (thumbnail_ready follows)."""
+        pixmap = self._pixmaps.get(digest)
+        if pixmap is not None:
+            self._pixmaps.move_to_end(digest)
+            return pixmap
+
+        path = self.path_for(digest)
+        if os.path.isfile(path):
+            pixmap = QPixmap(path)
+            if not pixmap.isNull():
+                self._remember(digest, pixmap)
+                return pixmap
+
+        if digest not in self._failed and digest != self._rendering_digest():
+            self._queue[digest] = asset_path
+            self._queue.move_to_end(digest)
+            self._render_next()
+        return None
+
+    def cancel_pending(self):
+        # Rows no longer on screen; the one being rendered still finishes
+        self._queue.clear()
+
+    def _remember(self, digest, pixmap):
+        self._pixmaps[digest] = pixmap
+        while len(self._pixmaps) > self.max_pixmaps:
+            self._pixmaps.popitem(last=False)
+
+    def _render_next(self):
+        if self._rendering is not None or not self._queue:
+            return
+        digest, asset_path = self._queue.popitem(last=True)
+        self._rendering = (digest, asset_path)
+        self._render_timer.start(RENDER_TIMEOUT_MS)
+        self.viewer.render_thumbnail(asset_path, digest, self.size)
+
+    def _rendering_digest(self):
+        return self._rendering[0] if self._rendering else None
+
+    def _on_render_timeout(self):
+        if self._rendering is not None:
+            self._on_failed(self._rendering[0], "timed out")
+
+    def _on_page_reload(self):
+        if self._rendering is None:
+            return
+        digest, asset_path = self._rendering
+        self._rendering = None
+        self._render_timer.stop()
+        self._queue[digest] = asset_path
+        self._render_next()
+
+    def _on_rendered(self, digest, png):
+        if digest != self._rendering_digest():
+            return
+        self._rendering = None
+        self._render_timer.stop()
+
+        pixmap = QPixmap()
+        if pixmap.loadFromData(png, "PNG"):
+            # Written under a temporary name so a half-written file is never read back
+            path = self.path_for(digest)
+            try:
+                with open(path + ".tmp", "wb") as f:
+                    f.write(png)
+                os.replace(path + ".tmp", path)
+            except OSError as e:
+                print(f"[WARN] Could not cache thumbnail {path}: {e}")
+            self._remember(digest, pixmap)
+            self.thumbnail_ready.emit(digest)
+        else:
+            self._failed.add(digest)
+        self._render_next()
+
+    def _on_failed(self, digest, error):
+        if digest != self._rendering_digest():
+            return
+        self._rendering = None
+        self._render_timer.stop()
+        self._failed.add(digest)
+        print(f"[WARN] Thumbnail failed for {digest[:12]}: {error}")
+        self._render_next()
+
+class AssetListModel(QAbstractListModel):
+    """Library assets for the gallery; a thumbnail is only requested once its row is painted."""
+
+    FilenameRole = Qt.UserRole + 1
+    SearchRole = Qt.UserRole + 2
+
+    def __init__(self, selector, thumbnails, parent=None):
+        super().__init__(parent)
+        # The selector's asset set is kept current by its directory watcher
+        self.selector = selector
+        self.store = selector.store
+        self.assets_dir = selector.assets_dir
+        self.thumbnails = thumbnails
+        self.rows = []
+        self._rows_for_hash = defaultdict(list)  # assets with identical content share a thumbnail
+
+        # Hashes missing from the store are computed on a background thread
+        # and applied by a timer on the GUI thread
+        self._generation = 0
+        self._hashed = []  # (generation, row, digest)
+        self._hashing = 0  # hashing threads still running
+        self._hash_lock = threading.Lock()
+        self._hash_timer = QTimer(self)
+        self._hash_timer.timeout.connect(self._apply_hashes)
+
+        self._placeholder = QPixmap(thumbnails.size, thumbnails.size)
+        self._placeholder.fill(QColor(128, 128, 128, 48))
+
+        thumbnails.thumbnail_ready.connect(self._on_thumbnail_ready)
+        self.reload()
+
+    def reload(self):
+        self.beginResetModel()
+        self.rows = [
+            dict(asset, search=f"{asset['filename']} {asset['description'] or ''}".lower())
+            for asset in self.store.assets()
+            if asset["filename"] in self.selector.available
+        ]
+        self._rows_for_hash = defaultdict(list)
+        missing = []
+        for row, asset in enumerate(self.rows):
+            if asset["file_hash"]:
+                self._rows_for_hash[asset["file_hash"]].append(row)
+            else:
+                missing.append((row, asset["filename"]))
+        self.endResetModel()
+
+        self._generation += 1
+        if missing:
+            with self._hash_lock:
+                self._hashing += 1
+            threading.Thread(target=self._hash_files, args=(self._generation, missing), daemon=True).start()
+            self._hash_timer.start(100)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        asset = self.rows[index.row()]
+
+        if role == Qt.DisplayRole:
+            return os.path.splitext(asset["filename"])[0]
+        if role == Qt.ToolTipRole:
+            return f"{asset['filename']}\n{asset['description'] or '(no description)'}"
+        if role == Qt.DecorationRole:
+            digest = asset["file_hash"]
+            if not digest:
+                return self._placeholder
+            path = os.path.join(self.assets_dir, asset["filename"])
+            return self.thumbnails.pixmap(digest, path) or self._placeholder
+        if role == self.FilenameRole:
+            return asset["filename"]
+        if role == self.SearchRole:
+            return asset["search"]
+        return None
+
+    def _hash_files(self, generation, missing):
+        # Assets added before hashes were stored; each file is hashed once and the store updated
+        try:
+            for row, filename in missing:
+                path = os.path.join(self.assets_dir, filename)
+                try:
+                    digest = file_hash(path)
+                    self.store.set_file_hash(filename, digest, os.path.getsize(path))
+                except Exception as e:
+                    print(f"[WARN] Could not hash {filename}: {e}")
+                    continue
+                with self._hash_lock:
+                    self._hashed.append((generation, row, digest))
+        finally:
+            with self._hash_lock:
+                self._hashing -= 1
+
+    def _apply_hashes(self):
+        with self._hash_lock:
+            hashed, self._hashed = self._hashed, []
+            done = self._hashing == 0
+        for generation, row, digest in hashed:
+            if generation != self._generation:
+                continue
+            self.rows[row]["file_hash"] = digest
+            self._rows_for_hash[digest].append(row)
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+        if done:
+            self._hash_timer.stop()
+
+    def _on_thumbnail_ready(self, digest):
+        for row in self._rows_for_hash.get(digest, ()):
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+class AssetFilterProxy(QSortFilterProxyModel):
+    """Keeps rows whose filename or description contains every word of the filter text."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._words = []
+
+    def set_filter_text(self, text):
+        words = text.lower().split()
+        if words == self._words:
+            return
+        self._words = words
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if not self._words:
+            return True
+        index = self.sourceModel().index(source_row, 0, source_parent)
+        search = self.sourceModel().data(index, AssetListModel.SearchRole)
+        return all(word in search for word in self._words)
+
+class ModelGalleryDialog(QDialog):
+    asset_activated = Signal(str)  # filename
+
+    def __init__(self, selector, thumbnails, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Saved 3D Models")
+        self.resize(720, 540)
+        self.thumbnails = thumbnails
+
+        self.model = AssetListModel(selector, thumbnails, self)
+        self.proxy = AssetFilterProxy(self)
+        self.proxy.setSourceModel(self.model)
+
+        self.search = QLineEdit(self)
+        self.search.setPlaceholderText("Filter by name or description...")
+        self.search.setClearButtonEnabled(True)
+        self.search.textChanged.connect(self._on_filter_changed)
+
+        # Icon mode with uniform items only lays out and paints the rows in view
+        size = thumbnails.size
+        self.view = QListView(self)
+        self.view.setViewMode(QListView.IconMode)
+        self.view.setResizeMode(QListView.Adjust)
+        self.view.setMovement(QListView.Static)
+        self.view.setUniformItemSizes(True)
+        self.view.setLayoutMode(QListView.Batched)
+        self.view.setBatchSize(200)
+        self.view.setIconSize(QSize(size, size))
+        self.view.setGridSize(QSize(size + 24, size + 40))
+        self.view.setWordWrap(True)
+        self.view.setModel(self.proxy)
+        self.view.activated.connect(self._on_activated)
+
+        self.count_label = QLabel(self)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close, parent=self)
+        buttons.rejected.connect(self.reject)
+
+        v = QVBoxLayout(self)
+        v.addWidget(self.search)
+        v.addWidget(self.view, 1)
+        v.addWidget(self.count_label)
+        v.addWidget(buttons)
+
+        self._update_count()
+        self.search.setFocus()
+
+    def _on_filter_changed(self, text):
+        # Thumbnails queued for rows that are now hidden are dropped
+        self.thumbnails.cancel_pending()
+        self.proxy.set_filter_text(text)
+        self._update_count()
+
+    def _update_count(self):
+        total = self.model.rowCount()
+        shown = self.proxy.rowCount()
+        self.count_label.setText(f"{total} models" if shown == total else f"{shown} of {total} models")
+
+    def _on_activated(self, index):
+        self.asset_activated.emit(index.data(AssetListModel.FilenameRole))
+        self.accept()
+
+    def done(self, result):
+        self.thumbnails.cancel_pending()
+        super().done(result)
@@ -1,64 +1,390 @@
-from sentence_transformers import SentenceTransformer, util
-import torch
-import json
+import numpy as np
+import threading
+import time
 import os
+from collections import OrderedDict
+from asset_store import AssetStore
+from embedding_index import EmbeddingIndex
+from lexical_index import LexicalIndex
+from onnx_encoder import OnnxEncoder
 from utils import get_models_dir, get_viewer_assets
 
+# Fused score = semantic similarity + LEXICAL_WEIGHT * lexical score (capped at 1)
+LEXICAL_WEIGHT = 0.2
+# A full lexical match must beat the runner-up by this much to skip the encoder
+LEXICAL_MARGIN = 0.25
+# Seconds between checks of the asset directory for added/removed files
+WATCH_INTERVAL = 2.0
+# Seconds typed text must stay unchanged before it is looked up for prefetching
+PREDICT_DELAY = 0.25
+
 class ModelSelector:
-    def __init__(self):
-        model_path = os.path.join(get_models_dir(), "all-MiniLM-L6-v2")
-        self.model = SentenceTransformer(model_path)
+    def __init__(self, background=True, query_cache_size=256, backend="auto", watch=True):
+        self.model = None
+        self.backend = backend  # "auto", "onnx" or "torch"
+
+        # LRU of normalized query embeddings, keyed by normalized query text
+        self.query_cache = OrderedDict()
+        self.query_cache_size = query_cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache_lock = threading.Lock()
 
+        # Asset metadata + embeddings, seeded from model_descriptions.json on first run
         self.desc_file = os.path.join(get_viewer_assets(), "model_descriptions.json")
-        self.model_descriptions = self.load_descriptions(self.desc_file)
-        self.descriptions = list(self.model_descriptions.values())
-        self.embeddings = self.model.encode(self.descriptions, convert_to_tensor=True)
-    
-    def load_descriptions(self, filepath):
+        self.store = AssetStore(os.path.join(get_viewer_assets(), "assets.db"), json_path=self.desc_file)
+
+        # Only assets that exist on disk are indexed, so queries never need to stat files
+        self.assets_dir = os.path.join(get_viewer_assets(), "3d_assets")
+        self.available = self.scan_assets()
+        self._assets_mtime = self._dir_mtime()
+        self._lock = threading.RLock()  # guards the indexes against the watcher thread
+
+        # Built up front (no model needed) so exact matches work while the encoder loads
+        self.lexical = LexicalIndex()
+        self.lexical.build(self.indexed_descriptions())
+
+        # Embeddings persisted in the store, only new/changed entries are encoded
+        self.index = EmbeddingIndex(self.store, "all-MiniLM-L6-v2")
+
+        # Loading torch + MiniLM takes seconds, so by default it happens off the GUI thread
+        self.ready = threading.Event()
+        self.error = None
+        if background:
+            threading.Thread(target=self._initialize, daemon=True).start()
+        else:
+            self._initialize()
+
+        self._watch_stop = threading.Event()
+        if watch:
+            threading.Thread(target=self._watch_assets, daemon=True).start()
+
+        # As-you-type lookups, debounced on their own thread (started on first use)
+        self._predict_cond = threading.Condition()
+        self._predict_text = None  # latest text waiting to be looked up
+        self._predict_at = 0.0
+        self._predict_running = False
+        self._predictions = None  # (text, model paths) not yet taken
+        self._predict_thread = None
+
+    def _initialize(self):
+        start = time.perf_counter()
         try:
-            if os.path.exists(filepath):
-                with open(filepath, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    if isinstance(data, dict) and len(data) > 0:
-                        return data
+            onnx_path = os.path.join(get_models_dir(), "all-MiniLM-L6-v2-onnx")
+            use_onnx = self.backend == "onnx" or (self.backend == "auto" and OnnxEncoder.is_available(onnx_path))
+
+            if use_onnx:
+                # int8 ONNX Runtime model, keeps torch out of the GUI process
+                self.model = OnnxEncoder(onnx_path)
+                # Embeddings differ slightly between backends, so index them separately
+                self.index.model_name = "all-MiniLM-L6-v2-onnx-int8"
+            else:
+                from sentence_transformers import SentenceTransformer
+
+                model_path = os.path.join(get_models_dir(), "all-MiniLM-L6-v2")
+                self.model = SentenceTransformer(model_path)
+            print(f"[INFO] ModelSelector backend: {'onnx' if use_onnx else 'torch'}")
+
+            with self._lock:
+                self.index.sync(self.indexed_descriptions(), self.encode)
+            print(f"[INFO] ModelSelector ready in {time.perf_counter() - start:.2f}s")
         except Exception as e:
-            print(f"Failed to load descriptions from {filepath}: {e}")
-        return {}
+            self.error = e
+            print("[ERROR] Failed to initialize ModelSelector:", e)
+        finally:
+            self.ready.set()
 
-    def save_descriptions(self):
-        os.makedirs(os.path.dirname(self.desc_file), exist_ok=True)
-        with open(self.desc_file, "w", encoding="utf-8") as f:
-            json.dump(self.model_descriptions, f, indent=2)
+    def is_ready(self):
+        return self.ready.is_set()
 
+    def wait_ready(self, timeout=None):
+        """Block until initialization finished. Returns True if the selector is usable."""
+        return self.ready.wait(timeout) and self.error is None
+
+    def scan_assets(self):
+        try:
+            return {entry.name for entry in os.scandir(self.assets_dir) if entry.is_file()}
+        except FileNotFoundError:
+            return set()
+
+    def _dir_mtime(self):
+        try:
+            return os.stat(self.assets_dir).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @property
+    def model_descriptions(self):
+        """{filename: description} for every asset in the store (cached in memory)."""
+        return self.store.descriptions()
+
+    def indexed_descriptions(self):
+        """Descriptions of assets that actually exist in the asset directory."""
+        return {f: d for f, d in self.model_descriptions.items() if f in self.available}
+
+    def refresh_assets(self, force=False):
+        """
+        Reconcile the indexes with the asset directory (and, with `force`, with
+        store changes made by another process). Returns True if anything changed.
+        """
+        found = self.scan_assets()
+        with self._lock:
+            if found == self.available and not force:
+                return False
+            added, removed = found - self.available, self.available - found
+            self.available = found
+            indexed = self.indexed_descriptions()
+            self.lexical.build(indexed)
+            if self.is_ready() and self.error is None:
+                # Only descriptions of newly appeared files get encoded
+                self.index.sync(indexed, self.encode)
+        print(f"[INFO] Asset directory changed: +{len(added)} -{len(removed)}")
+        return True
+
+    def _watch_assets(self):
+        # Adding, removing or renaming a file updates the directory's mtime
+        while not self._watch_stop.wait(WATCH_INTERVAL):
+            mtime = self._dir_mtime()
+            store_changed = self.store.changed()
+            if mtime != self._assets_mtime or store_changed:
+                self._assets_mtime = mtime
+                try:
+                    self.refresh_assets(force=store_changed)
+                except Exception as e:
+                    print("[WARN] Failed to refresh asset index:", e)
+
+    def stop_watching(self):
+        self._watch_stop.set()
+        with self._predict_cond:
+            self._predict_cond.notify_all()
+
+    def encode(self, texts):
+        embeddings = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        return np.asarray(embeddings, dtype=np.float32)
+    
     def add_model(self, filename, description):
-        self.model_descriptions[filename] = description
-        self.save_descriptions()
-        self.descriptions = list(self.model_descriptions.values())
-        self.embeddings = self.model.encode(self.descriptions, convert_to_tensor=True)
+        path = os.path.join(self.assets_dir, filename)
+        self.store.put(filename, description, path)
+        if not os.path.isfile(path):
+            return
+        ready = self.wait_ready()
+        with self._lock:
+            self.available.add(filename)
+            self.lexical.add(filename, description)
+            if ready:
+                self.index.add(filename, description, self.encode)
 
     def remove_model(self, filename):
-        if filename in self.model_descriptions:
-            del self.model_descriptions[filename]
-            self.save_descriptions()
-            self.descriptions = list(self.model_descriptions.values())
-            self.embeddings = self.model.encode(self.descriptions, convert_to_tensor=True)
-
-    def get_best_match(self, input_text, threshold=0.5):
-        query_embedding = self.model.encode(input_text, convert_to_tensor=True)
-        scores = util.cos_sim(query_embedding, self.embeddings)[0]
-        best_score = torch.max(scores).item()
-        best_idx = torch.argmax(scores).item()
-
-        if best_score < threshold:
-            return None, best_score
-        
-        filename = list(self.model_descriptions.keys())[best_idx]
-        print("Filename:", filename)
-
-        model_path = os.path.join(get_viewer_assets(), "3d_assets", filename)
-
-        if os.path.isfile(model_path):
-            print("Model path:", model_path, "Best score:", best_score)
-            return model_path, best_score
+        if self.store.get(filename) is not None:
+            self.store.delete(filename)
+            ready = self.wait_ready()
+            with self._lock:
+                self.available.discard(filename)
+                self.lexical.remove(filename)
+                if ready:
+                    self.index.remove(filename)
+
+    def embed_queries(self, texts):
+        """
+        Normalized embeddings for `texts`, one row each. Cached queries are
+        reused; all misses are encoded together in one forward pass.
+        """
+        # MiniLM is uncased, so case and extra whitespace don't change the embedding
+        keys = [" ".join(t.lower().split()) for t in texts]
+        rows = {}
+
+        with self._cache_lock:
+            for key in keys:
+                if key in self.query_cache:
+                    self.query_cache.move_to_end(key)
+                    rows[key] = self.query_cache[key]
+            missing = [key for key in dict.fromkeys(keys) if key not in rows]
+            n_missed = sum(1 for key in keys if key not in rows)
+            self.cache_hits += len(keys) - n_missed
+            self.cache_misses += n_missed
+
+        if missing:
+            for key, embedding in zip(missing, self.encode(missing)):
+                rows[key] = embedding
+            with self._cache_lock:
+                for key in missing:
+                    self.query_cache[key] = rows[key]
+                    self.query_cache.move_to_end(key)
+                while len(self.query_cache) > self.query_cache_size:
+                    self.query_cache.popitem(last=False)
+
+        return np.stack([rows[key] for key in keys])
+
+    def cache_stats(self):
+        with self._cache_lock:
+            total = self.cache_hits + self.cache_misses
+            return {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": self.cache_hits / total if total else 0.0,
+                "size": len(self.query_cache),
+            }
+
+    def search(self, input_text, k=5):
+        """Top-k (filename, score) matches for `input_text`, best first."""
+        return self.search_many([input_text], k)[0]
+
+    def search_many(self, texts, k=5):
+        """
+        search() for every text in `texts`. Confident lexical hits are answered
+        without the encoder; the rest are encoded in one batch and ranked by
+        semantic similarity boosted with the lexical score.
+        """
+        results = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            hit = self.lexical_match(text)
+            if hit is not None:
+                results[i] = [(hit, 1.0)]
+            else:
+                pending.append(i)
+
+        if not pending:
+            return results
+        if not self.wait_ready() or len(self.index) == 0:
+            # No encoder available, lexical ranking is the best we can do
+            with self._lock:
+                for i in pending:
+                    results[i] = self.lexical.search(texts[i], k)
+            return results
+
+        embeddings = self.embed_queries([texts[i] for i in pending])
+        with self._lock:
+            semantic = self.index.search_batch(embeddings, max(k, 10))
+            for i, embedding, matches in zip(pending, embeddings, semantic):
+                results[i] = self._fuse(texts[i], embedding, matches, k)
+        return results
+
+    def lexical_match(self, text):
+        """Filename that lexically matches `text` with high confidence, else None."""
+        with self._lock:
+            exact = self.lexical.exact_match(text)
+            if exact is not None:
+                return exact
+            top = self.lexical.search(text, k=2)
+
+        if top and top[0][1] >= 0.999:
+            if len(top) == 1 or top[0][1] - top[1][1] >= LEXICAL_MARGIN:
+                return top[0][0]
+        return None
+
+    def can_answer_now(self, text):
+        """True if a query for `text` will not have to wait for the encoder to load."""
+        return self.is_ready() or self.lexical_match(text) is not None
+
+    def _fuse(self, text, embedding, semantic, k):
+        scores = {self.index.ids[row]: score for row, score in semantic}
+        lexical = dict(self.lexical.search(text, k=10))
+
+        # Lexical candidates outside the semantic top list still need a semantic score
+        for filename in lexical:
+            if filename not in scores:
+                row = self.index.row_of(filename)
+                if row is not None:
+                    scores[filename] = float(self.index.matrix[row] @ embedding)
+
+        fused = [
+            (filename, min(1.0, score + LEXICAL_WEIGHT * lexical.get(filename, 0.0)))
+            for filename, score in scores.items()
+        ]
+        fused.sort(key=lambda item: item[1], reverse=True)
+        return fused[:k]
+
+    def get_best_match(self, input_text, threshold=0.5, k=5):
+        # Extra candidates let a vanished asset fall through to the next best one
+        return self._resolve_match(self.search(input_text, k=k), threshold)
+
+    def get_best_matches(self, texts, threshold=0.5, k=5):
+        """get_best_match() for a list of texts, as a list of (model_path, score)."""
+        return [self._resolve_match(matches, threshold) for matches in self.search_many(texts, k=k)]
+
+    def predict(self, text, k=2, threshold=0.5):
+        """
+        Paths of up to `k` assets a query for `text` is likely to resolve to,
+        for prefetching. Never waits for the encoder: until it has loaded only
+        lexical matches are returned. The query embedding is cached, so
+        submitting the same text afterwards skips the encoder.
+        """
+        if not text.strip():
+            return []
+        if self.can_answer_now(text):
+            matches = self.search(text, k=k)
         else:
+            with self._lock:
+                matches = self.lexical.search(text, k)
+        return [
+            os.path.join(self.assets_dir, filename)
+            for filename, score in matches
+            if score >= threshold and filename in self.available
+        ]
+
+    def predict_later(self, text, k=2):
+        """Debounced predict(): runs on a background thread once `text` has been unchanged for PREDICT_DELAY."""
+        with self._predict_cond:
+            self._predict_text = (text, k)
+            self._predict_at = time.monotonic() + PREDICT_DELAY
+            if self._predict_thread is None:
+                self._predict_thread = threading.Thread(target=self._predict_loop, daemon=True)
+                self._predict_thread.start()
+            self._predict_cond.notify()
+
+    def prediction_pending(self):
+        """True while a predict_later() call has not produced its result yet."""
+        with self._predict_cond:
+            return self._predict_text is not None or self._predict_running
+
+    def take_predictions(self):
+        """(text, model paths) of the latest finished prediction, or None. Each result is returned once."""
+        with self._predict_cond:
+            result, self._predictions = self._predictions, None
+            return result
+
+    def _predict_loop(self):
+        while not self._watch_stop.is_set():
+            with self._predict_cond:
+                if self._predict_text is None:
+                    self._predict_cond.wait()
+                    continue
+                # Every keystroke pushes the deadline back
+                delay = self._predict_at - time.monotonic()
+                if delay > 0:
+                    self._predict_cond.wait(delay)
+                    continue
+                (text, k), self._predict_text = self._predict_text, None
+                self._predict_running = True
+
+            try:
+                paths = self.predict(text, k=k)
+            except Exception as e:
+                print("[WARN] Prediction failed:", e)
+                paths = []
+
+            with self._predict_cond:
+                self._predict_running = False
+                # Superseded if the text changed while this lookup ran
+                if self._predict_text is None:
+                    self._predictions = (text, paths)
+
+    def _resolve_match(self, matches, threshold):
+        if not matches:
             return None, 0.0
+
+        best_score = matches[0][1]
+        for filename, score in matches:
+            if score < threshold:
+                break
+            # Set lookup instead of a stat; the watcher keeps `available` current
+            if filename not in self.available:
+                continue
+
+            print("Filename:", filename)
+            model_path = os.path.join(self.assets_dir, filename)
+            print("Model path:", model_path, "Best score:", score)
+            return model_path, score
+
+        return None, best_score
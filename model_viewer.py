@@ -1,9 +1,63 @@
 from PySide6.QtWebEngineWidgets import QWebEngineView
-from PySide6.QtCore import QUrl, QFileInfo
+from PySide6.QtWebChannel import QWebChannel
+from PySide6.QtCore import QObject, Signal, Slot
+from asset_scheme import AssetCache, AssetSchemeHandler, SCHEME, cache_digest
+from asset_optimizer import lod_path_for
 from utils import get_viewer_assets
+import base64
+import json
 import os
 
+class ViewerBridge(QObject):
+    """Shared with viewer.js over QWebChannel as `bridge`."""
+
+    # Python -> page
+    loadRequested = Signal(str, str)  # model url, coarse LOD url or ""
+    clearRequested = Signal()
+    themeRequested = Signal(str)
+    thumbnailRequested = Signal(str, str, int)  # key, url of the model or its LOD, size
+    prefetchRequested = Signal(str)
+
+    # page -> Python
+    pageReady = Signal()
+    loadStarted = Signal(str)
+    loadFinished = Signal(str, str)
+    loadFailed = Signal(str, str)
+    thumbnailRendered = Signal(str, str)
+    thumbnailFailed = Signal(str, str)
+
+    @Slot()
+    def ready(self):
+        self.pageReady.emit()
+
+    @Slot(str)
+    def reportLoadStarted(self, url):
+        self.loadStarted.emit(url)
+
+    @Slot(str, str)
+    def reportLoadFinished(self, url, timings_json):
+        self.loadFinished.emit(url, timings_json)
+
+    @Slot(str, str)
+    def reportLoadFailed(self, url, error):
+        self.loadFailed.emit(url, error)
+
+    @Slot(str, str)
+    def reportThumbnail(self, key, data_url):
+        self.thumbnailRendered.emit(key, data_url)
+
+    @Slot(str, str)
+    def reportThumbnailFailed(self, key, error):
+        self.thumbnailFailed.emit(key, error)
+
 class ModelViewer(QWebEngineView):
+    # Paths are the ones passed to load_model
+    model_load_started = Signal(str)
+    model_loaded = Signal(str, dict)  # timings in ms: parseMs, firstRenderMs, totalMs, ...
+    model_load_failed = Signal(str, str)
+    thumbnail_ready = Signal(str, bytes)  # key passed to render_thumbnail, PNG data
+    thumbnail_failed = Signal(str, str)
+
     def __init__(self, model_path=None, parent=None):
         super().__init__(parent)
 
@@ -13,40 +67,178 @@ class ModelViewer(QWebEngineView):
         if not os.path.exists(local_html_path):
             raise FileNotFoundError("Missing HTML viewer at: " + local_html_path)
 
-        self.load(QUrl.fromLocalFile(local_html_path))
+        # Models are served from memory via asset://viewer/cache/<hash>/<name>
+        self.asset_cache = AssetCache(on_evict=self._forget_digest)
+        self.scheme_handler = AssetSchemeHandler(self.asset_cache, viewer_assets_dir, self)
+        self.page().profile().installUrlSchemeHandler(SCHEME, self.scheme_handler)
+
+        self.bridge = ViewerBridge(self)
+        self.channel = QWebChannel(self.page())
+        self.channel.registerObject("bridge", self.bridge)
+        self.page().setWebChannel(self.channel)
+        self.bridge.pageReady.connect(self._on_page_ready)
+        self.bridge.loadStarted.connect(lambda url: self.model_load_started.emit(self._path_for(url)))
+        self.bridge.loadFinished.connect(self._on_load_finished)
+        self.bridge.loadFailed.connect(lambda url, error: self.model_load_failed.emit(self._path_for(url), error))
+        self.bridge.thumbnailRendered.connect(self._on_thumbnail_rendered)
+        self.bridge.thumbnailFailed.connect(self.thumbnail_failed)
+
+        # Requests made before the page is ready are replayed once it is
+        self._page_ready = False
+        self._pending = None  # ("load", url, lod_url) or ("clear",)
+        self._theme = None
+        self._pending_thumbnails = []
+        self._paths = {}  # content hash -> path passed to load_model, dropped with the cached bytes
+        self.loadStarted.connect(self._on_page_load_started)
+
+        # The page itself is served from the same scheme, so its Web Worker is same-origin
+        self.load(self.scheme_handler.page_url("index.html"))
+
+    def _on_page_load_started(self):
+        self._page_ready = False
+
+    def _on_page_ready(self):
+        self._page_ready = True
+        if self._theme:
+            self.bridge.themeRequested.emit(self._theme)
+        pending, self._pending = self._pending, None
+        if pending and pending[0] == "load":
+            self.bridge.loadRequested.emit(pending[1], pending[2])
+        elif pending:
+            self.bridge.clearRequested.emit()
+        thumbnails, self._pending_thumbnails = self._pending_thumbnails, []
+        for request in thumbnails:
+            self.bridge.thumbnailRequested.emit(*request)
+
+    def _path_for(self, url):
+        return self._paths.get(cache_digest(url), url)
+
+    def _forget_digest(self, digest):
+        self._paths.pop(digest, None)
+
+    def _on_load_finished(self, url, timings_json):
+        try:
+            timings = json.loads(timings_json)
+        except ValueError:
+            timings = {}
+        self.model_loaded.emit(self._path_for(url), timings)
+
+    def _on_thumbnail_rendered(self, key, data_url):
+        try:
+            png = base64.b64decode(data_url.split(",", 1)[1])
+        except (IndexError, ValueError) as e:
+            self.thumbnail_failed.emit(key, f"Bad thumbnail data: {e}")
+            return
+        self.thumbnail_ready.emit(key, png)
+
+    def _fresh_lod(self, model_filename):
+        # A LOD older than its asset belongs to a previous version of it
+        lod_path = lod_path_for(model_filename)
+        if os.path.isfile(lod_path) and os.path.getmtime(lod_path) >= os.path.getmtime(model_filename):
+            return lod_path
+        return None
 
+    def _urls_for(self, model_filename):
+        # The content hash is part of the URL, so a regenerated file is never served stale
+        model_url = self.asset_cache.url_for(model_filename)
+        self._paths[cache_digest(model_url)] = model_filename
+
+        # A coarse LOD stored with the asset is shown first
+        lod_path = self._fresh_lod(model_filename)
+        lod_url = self.asset_cache.url_for(lod_path) if lod_path else ""
+        return model_url, lod_url
 
     def load_model(self, model_filename):
         if not os.path.isfile(model_filename):
             print(f"Model file does not exist: {model_filename}")
+            self.model_load_failed.emit(model_filename, "File does not exist")
             return
-        model_url = QUrl.fromLocalFile(model_filename).toString()
-        js_code = f"""
-        if (typeof loadModel === 'function') {{
-            loadModel('{model_url}');
-        }} else {{
-            console.error('loadModel function not found in page');
-        }}
+        model_url, lod_url = self._urls_for(model_filename)
+        if self._page_ready:
+            self.bridge.loadRequested.emit(model_url, lod_url)
+        else:
+            self._supersede_pending()
+            self._pending = ("load", model_url, lod_url)
+
+    def prefetch_model(self, model_filename):
+        """
+        Read `model_filename` into the asset cache and parse it into the
+        viewer's model cache without showing it, so a later load_model is
+        served from memory. Skipped until the page is ready.
         """
-        self.page().runJavaScript(js_code)
+        if not self._page_ready or not os.path.isfile(model_filename):
+            return
+        # The LOD is not needed; a cached full model is shown directly
+        model_url = self.asset_cache.url_for(model_filename)
+        self._paths[cache_digest(model_url)] = model_filename
+        self.bridge.prefetchRequested.emit(model_url)
+
+    def render_thumbnail(self, model_filename, key, size=160):
+        """Render `model_filename` offscreen; the PNG arrives via thumbnail_ready(key, png)."""
+        # Read from disk, not through the asset cache, so scrolling the gallery
+        # never evicts models the viewer uses; the LOD is drawn if there is one
+        try:
+            url = self.asset_cache.direct_url_for(self._fresh_lod(model_filename) or model_filename)
+        except OSError as e:
+            self.thumbnail_failed.emit(key, str(e))
+            return
+        request = (key, url, size)
+        if self._page_ready:
+            self.bridge.thumbnailRequested.emit(*request)
+        else:
+            self._pending_thumbnails.append(request)
+
+    def _supersede_pending(self):
+        # A queued load that never reaches the page still gets its failed signal
+        if self._pending and self._pending[0] == "load":
+            self.model_load_failed.emit(self._path_for(self._pending[1]), "superseded")
 
     def clear_model(self):
-        js_code = """
-        if (typeof clearModel === 'function') {
-            clearModel();
-        } else {
-            console.error('clearModel function not found in page');
-        }
-        """
-        self.page().runJavaScript(js_code)
+        if self._page_ready:
+            self.bridge.clearRequested.emit()
+        else:
+            self._supersede_pending()
+            self._pending = ("clear",)
 
     def set_theme(self, mode: str):
-        mode = "light" if str(mode).lower() == "light" else "dark"
-        js_code = f"""
-        if (typeof setTheme === 'function') {{
-            setTheme('{mode}');
-        }} else {{
-            console.error('setTheme function not found in page');
-        }}
-        """
-        self.page().runJavaScript(js_code)
+        self._theme = "light" if str(mode).lower() == "light" else "dark"
+        if self._page_ready:
+            self.bridge.themeRequested.emit(self._theme)
+
+    def get_memory_stats(self, callback):
+        """
+        Calls `callback` with the renderer's GPU resource counts:
+        {"geometries", "textures", "programs", "drawCalls", "triangles"}
+        (draw calls and triangles are for the last rendered frame).
+        """
+        js_code = "typeof getMemoryStats === 'function' ? getMemoryStats() : null"
+        self.page().runJavaScript(js_code, 0, callback)
+
+    def get_render_stats(self, callback):
+        """
+        Calls `callback` with {"fps", "frameTimeMs", "framesRendered"}.
+        The viewer renders on demand, so fps is 0 while nothing changes.
+        """
+        js_code = "typeof getRenderStats === 'function' ? getRenderStats() : null"
+        self.page().runJavaScript(js_code, 0, callback)
+
+    def get_model_cache_stats(self, callback):
+        """
+        Calls `callback` with the viewer's parsed-model cache state:
+        {"entries", "vertices", "maxVertices", "maxEntries", "hits", "misses", "urls"}.
+        """
+        js_code = "typeof getModelCacheStats === 'function' ? getModelCacheStats() : null"
+        self.page().runJavaScript(js_code, 0, callback)
+
+    def clear_model_cache(self):
+        # Frees every cached model except the one on screen
+        self.page().runJavaScript("if (typeof clearModelCache === 'function') clearModelCache();")
+
+    def get_load_timings(self, callback):
+        """
+        Calls `callback` with timings of the last model load, in ms:
+        {"url", "fetchMs", "parseMs", "buildMs", "totalMs", "bytes", "worker"}.
+        "worker" is False if parsing fell back to the page's main thread.
+        """
+        js_code = "typeof getLoadTimings === 'function' ? getLoadTimings() : null"
+        self.page().runJavaScript(js_code, 0, callback)
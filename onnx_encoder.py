@@ -0,0 +1,66 @@
+import os
+import numpy as np
+
+ONNX_MODEL_FILE = "model_int8.onnx"
+
+class OnnxEncoder:
+    """
+    all-MiniLM-L6-v2 sentence embeddings through ONNX Runtime, without torch.
+    Reproduces the SentenceTransformer pipeline: WordPiece tokenization
+    (same tokenizer.json), transformer, attention-masked mean pooling and L2
+    normalization. Built by convert_minilm_onnx.py.
+    """
+
+    def __init__(self, model_dir, max_seq_length=256):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, ONNX_MODEL_FILE),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    @staticmethod
+    def is_available(model_dir):
+        if not os.path.exists(os.path.join(model_dir, ONNX_MODEL_FILE)):
+            return False
+        try:
+            import onnxruntime  # noqa: F401
+            import tokenizers  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+        # Same call shape as SentenceTransformer.encode for the arguments ModelSelector uses
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "token_type_ids": np.zeros_like(input_ids),
+        }
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        mask = attention_mask[:, :, None].astype(np.float32)
+        embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if normalize_embeddings:
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+        embeddings = embeddings.astype(np.float32)
+        return embeddings[0] if single else embeddings
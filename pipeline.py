@@ -42,6 +42,17 @@ class Pipeline:
             "model": model_path
         }
 
+    def generate_models(self, image_paths):
+        # Step 2 only, for many images with a single TripoSR load
+        generate_input = { "image_paths": list(image_paths) }
+        generate_output = self.run_stage(generate_exe, generate_input)
+        model_paths = generate_output.get("model_paths") or []
+
+        if len(model_paths) != len(generate_input["image_paths"]):
+            raise RuntimeError("3D model generation failed")
+
+        return model_paths
+
     @staticmethod
     def run_stage(exe, input_dict):
         with tempfile.NamedTemporaryFile("w+", delete=False, suffix=".json") as infile, \
@@ -2,6 +2,80 @@ import os
 import sys
 import subprocess
 import json
+import shutil
+import tempfile
+
+def get_whisper_paths():
+    if getattr(sys, 'frozen', False):
+        base_path = sys._MEIPASS
+    else:
+        base_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bin", "transcribe_build")
+
+    whisper_bin = os.path.join(base_path, "whisper-cli.exe")
+    model_path = os.path.join(base_path, "ggml-base.en.bin")
+    return whisper_bin, model_path
+
+def parse_whisper_json(data):
+    """
+    Convert whisper-cli full JSON output (-ojf) into
+    {"transcription", "language", "segments": [{start, end, text, confidence}]}.
+    Times are in seconds, confidence is the mean token probability.
+    """
+    segments = []
+    for seg in data.get("transcription", []):
+        probs = [
+            tok["p"] for tok in seg.get("tokens", [])
+            # skip special tokens such as [_BEG_] and [_TT_50]
+            if "p" in tok and not tok.get("text", "").startswith("[_")
+        ]
+        offsets = seg.get("offsets", {})
+        segments.append({
+            "start": offsets.get("from", 0) / 1000.0,
+            "end": offsets.get("to", 0) / 1000.0,
+            "text": seg.get("text", "").strip(),
+            "confidence": sum(probs) / len(probs) if probs else None,
+        })
+
+    return {
+        "transcription": " ".join(s["text"] for s in segments if s["text"]).strip(),
+        "language": data.get("result", {}).get("language"),
+        "segments": segments,
+    }
+
+def transcribe_files(audio_paths):
+    """
+    Transcribe all `audio_paths` with a single whisper-cli run (one model load).
+    Each input gets its own output file in a fresh temp dir, so results from a
+    previous or failed run can never be picked up.
+    """
+    whisper_bin, model_path = get_whisper_paths()
+    out_dir = tempfile.mkdtemp(prefix="transcribe_")
+
+    try:
+        cmd = [whisper_bin, "-m", model_path, "-ojf", "-np"]
+        out_prefixes = []
+        for i, audio_path in enumerate(audio_paths):
+            # whisper-cli pairs the n-th -of with the n-th -f
+            out_prefix = os.path.join(out_dir, str(i))
+            out_prefixes.append(out_prefix)
+            cmd += ["-f", audio_path, "-of", out_prefix]
+
+        print(f"Running whisper-cli on {len(audio_paths)} file(s)", flush=True)
+        subprocess.run(cmd, check=True)
+
+        results = []
+        for audio_path, out_prefix in zip(audio_paths, out_prefixes):
+            json_path = out_prefix + ".json"
+            if not os.path.exists(json_path):
+                results.append({"audio_path": audio_path, "error": f"No output for {audio_path}"})
+                continue
+            with open(json_path, "r", encoding="utf-8") as f:
+                result = parse_whisper_json(json.load(f))
+            result["audio_path"] = audio_path
+            results.append(result)
+        return results
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
 
 def main():
     print("Starting transcribe executable", flush=True)
@@ -16,45 +90,29 @@ def main():
     with open(input_json, "r") as f:
         input_data = json.load(f)
 
-    audio_path = input_data.get("audio_path")
-    if not audio_path or not os.path.exists(audio_path):
-        print(f"Invalid or missing audio file: {audio_path}")
-        sys.exit(1)
+    # Batch mode: {"audio_paths": [...]} -> {"results": [...]}
+    batch = "audio_paths" in input_data
+    audio_paths = input_data.get("audio_paths") if batch else [input_data.get("audio_path")]
 
-    if getattr(sys, 'frozen', False):
-        base_path = sys._MEIPASS
-    else:
-        base_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bin", "transcribe_build")
-
-    whisper_bin = os.path.join(base_path, "whisper-cli.exe")
-    model_path = os.path.join(base_path, "ggml-base.en.bin")
-
-    dlls = [
-        os.path.join(base_path, "whisper.dll"),
-        os.path.join(base_path, "ggml.dll"),
-        os.path.join(base_path, "ggml-base.dll"),
-        os.path.join(base_path, "ggml-cpu.dll"),
-    ]
-
-    print(f"Running whisper-cli on: {audio_path}", flush=True)
+    for audio_path in audio_paths or [None]:
+        if not audio_path or not os.path.exists(audio_path):
+            print(f"Invalid or missing audio file: {audio_path}")
+            sys.exit(1)
 
     try:
-        subprocess.run([
-            whisper_bin,
-            "-m", model_path,
-            "-f", audio_path,
-            "-otxt"
-        ], check=True)
-
-        txt_path = audio_path + ".txt"
-        if not os.path.exists(txt_path):
-            raise FileNotFoundError(f"Expected output not found: {txt_path}")
+        results = transcribe_files(audio_paths)
 
-        with open(txt_path, "r") as f:
-            transcription = f.read().strip()
+        if batch:
+            output = {"results": results}
+        else:
+            output = results[0]
+            if "error" in output:
+                raise RuntimeError(output["error"])
+            if not output["transcription"]:
+                raise RuntimeError("Empty transcription")
 
         with open(output_json, "w") as f:
-            json.dump({ "transcription": transcription }, f)
+            json.dump(output, f)
 
         print(f"Transcription written to {output_json}", flush=True)
 
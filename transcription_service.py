@@ -0,0 +1,313 @@
+import io
+import os
+import json
+import time
+import uuid
+import wave
+import socket
+import queue
+import threading
+import subprocess
+import urllib.request
+import numpy as np
+from pipeline import Pipeline
+from utils import get_app_dir, get_whisper_dir
+
+# Seconds a live (while recording) request may take; these windows are at most a few seconds of audio
+LIVE_TIMEOUT = 10.0
+
+class TranscriptionService:
+    """
+    Keeps a whisper.cpp server process running with the model loaded, so each
+    utterance only pays for inference. Falls back to the transcribe executable
+    (one whisper-cli run per recording) whenever the server is unavailable.
+    """
+
+    def __init__(self, samplerate=16000):
+        self.samplerate = samplerate
+        self.process = None
+        self.port = None
+
+        whisper_dir = get_whisper_dir()
+        exe = "whisper-server.exe" if os.name == "nt" else "whisper-server"
+        self.server_bin = os.path.join(whisper_dir, exe)
+        self.model_path = os.path.join(whisper_dir, "ggml-base.en.bin")
+        self.transcribe_exe = os.path.join(get_app_dir(), "transcribe.exe")
+
+    def start(self):
+        if self.process is not None:
+            return
+        if not os.path.exists(self.server_bin) or not os.path.exists(self.model_path):
+            print("[INFO] whisper-server not found, using transcribe executable.")
+            return
+
+        self.port = self._free_port()
+        try:
+            # Popen returns immediately; the model loads while the app starts up
+            self.process = subprocess.Popen(
+                [
+                    self.server_bin,
+                    "-m", self.model_path,
+                    "--host", "127.0.0.1",
+                    "--port", str(self.port),
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            print(f"[INFO] whisper-server starting on port {self.port}")
+        except OSError as e:
+            print("[WARN] Could not start whisper-server:", e)
+            self.process = None
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+
+    def is_ready(self):
+        if self.process is None or self.process.poll() is not None:
+            return False
+        # whisper-server only starts listening once the model is loaded
+        try:
+            with socket.create_connection(("127.0.0.1", self.port), timeout=0.2):
+                return True
+        except OSError:
+            return False
+
+    def transcribe(self, audio_data=None, audio_path=None):
+        """
+        Transcribe int16 samples (preferred, never touches disk) or a WAV file.
+        Returns the transcribed text, or None on failure.
+        """
+        if self.is_ready():
+            try:
+                if audio_data is not None:
+                    wav_bytes = self._to_wav_bytes(audio_data)
+                else:
+                    with open(audio_path, "rb") as f:
+                        wav_bytes = f.read()
+                return self._transcribe_server(wav_bytes)
+            except Exception as e:
+                print("[WARN] whisper-server request failed, falling back:", e)
+
+        return self._transcribe_cli(audio_data, audio_path)
+
+    def transcribe_live(self, audio_data):
+        """
+        Server-only transcription for partial results while recording.
+        Returns "" if nothing was said, and None instead of falling back when
+        the server is unavailable, since the CLI is too slow for this.
+        """
+        if not self.is_ready():
+            return None
+        try:
+            return self._transcribe_server(self._to_wav_bytes(audio_data), quiet=True, timeout=LIVE_TIMEOUT) or ""
+        except Exception as e:
+            print("[WARN] Live transcription failed:", e)
+            return None
+
+    def _transcribe_server(self, wav_bytes, quiet=False, timeout=60):
+        start = time.time()
+        boundary = uuid.uuid4().hex
+        fields = {"response_format": "json", "temperature": "0.0"}
+
+        body = io.BytesIO()
+        for name, value in fields.items():
+            body.write(f"--{boundary}\r\n".encode())
+            body.write(f'Content-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+        body.write(f"--{boundary}\r\n".encode())
+        body.write(b'Content-Disposition: form-data; name="file"; filename="audio.wav"\r\n')
+        body.write(b"Content-Type: audio/wav\r\n\r\n")
+        body.write(wav_bytes)
+        body.write(f"\r\n--{boundary}--\r\n".encode())
+
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{self.port}/inference",
+            data=body.getvalue(),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            result = json.load(response)
+
+        if not quiet:
+            print(f"[INFO] whisper-server transcription took {time.time() - start:.2f}s")
+        return (result.get("text") or "").strip() or None
+
+    def _transcribe_cli(self, audio_data, audio_path):
+        if not os.path.exists(self.transcribe_exe):
+            print("[ERROR] Transcribe executable needs to be in the same folder as the main app.")
+
+        if audio_path is None:
+            raise ValueError("The transcribe executable needs an audio file path.")
+        if audio_data is not None:
+            # The recorder may have kept the audio in memory only
+            with open(audio_path, "wb") as f:
+                f.write(self._to_wav_bytes(audio_data))
+
+        transcribe_output = Pipeline.run_stage(self.transcribe_exe, {"audio_path": audio_path})
+        return transcribe_output.get("transcription")
+
+    def _to_wav_bytes(self, audio_data):
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.samplerate)
+            wf.writeframes(np.asarray(audio_data, dtype=np.int16).tobytes())
+        return buf.getvalue()
+
+    @staticmethod
+    def _free_port():
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(("127.0.0.1", 0))
+            return s.getsockname()[1]
+
+
+class StreamingTranscriber:
+    """
+    Transcribes audio while it is still being recorded.
+
+    Frames from AudioRecorder are fed in as they arrive. A worker thread
+    re-transcribes the uncommitted audio every `step_s` seconds to produce
+    partial text. Once that audio reaches `window_s` seconds its text is
+    committed and only the last `overlap_s` seconds are kept as context for
+    the next window. finish() then only has to transcribe the short tail.
+    """
+
+    def __init__(self, service, samplerate=16000, window_s=8.0, step_s=1.0, overlap_s=1.0):
+        self.service = service
+        self.samplerate = samplerate
+        self.window = int(window_s * samplerate)
+        self.step_s = step_s
+        self.overlap = int(overlap_s * samplerate)
+
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pending = []
+        self._pending_len = 0
+        self._committed = ""
+        self._partial = ""
+        self._last_result = None  # (samples, text) of the latest transcription of _pending
+
+    @property
+    def partial_text(self):
+        with self._lock:
+            return self._partial
+
+    def start(self):
+        self._queue = queue.Queue()
+        # A fresh event per recording, so a worker left behind by cancel() never resumes
+        self._stop = threading.Event()
+        self._pending = []
+        self._pending_len = 0
+        self._committed = ""
+        self._partial = ""
+        self._last_result = None
+        self._thread = threading.Thread(target=self._run, args=(self._stop,), daemon=True)
+        self._thread.start()
+
+    def feed(self, chunk):
+        # Called from the audio callback thread, so only enqueue here
+        self._queue.put(chunk)
+
+    def finish(self):
+        """
+        Stop the worker and transcribe whatever has not been committed yet.
+        Returns the full text ("" if nothing was said), or None if live
+        transcription was unavailable.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            # A request in flight is waited for (bounded by its timeout) and its result reused
+            self._thread.join(timeout=LIVE_TIMEOUT + 1.0)
+            stuck = self._thread.is_alive()
+            self._thread = None
+            if stuck:
+                print("[WARN] Live transcription did not finish in time")
+                return None
+        self._drain()
+
+        if self._pending_len == 0:
+            return self._committed
+
+        with self._lock:
+            last = self._last_result
+        if last is not None and last[0] == self._pending_len:
+            # No audio arrived after the worker's last transcription
+            tail = last[1]
+        else:
+            tail = self.service.transcribe_live(np.concatenate(self._pending))
+            if tail is None:
+                return None
+        return merge_transcripts(self._committed, tail)
+
+    def cancel(self):
+        """Stop the worker without transcribing; any request in flight is discarded."""
+        self._stop.set()
+        self._thread = None
+        self._queue = queue.Queue()
+
+    def _drain(self):
+        while True:
+            try:
+                chunk = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            chunk = chunk.reshape(-1)
+            self._pending.append(chunk)
+            self._pending_len += len(chunk)
+
+    def _run(self, stop):
+        last = time.time()
+        while not stop.wait(0.05):
+            self._drain()
+            if time.time() - last < self.step_s or self._pending_len == 0:
+                continue
+            last = time.time()
+
+            audio = np.concatenate(self._pending)
+            text = self.service.transcribe_live(audio)
+            if stop is not self._stop:
+                # Cancelled; a new recording may already own the state
+                return
+            if text is None:
+                continue
+
+            with self._lock:
+                self._partial = merge_transcripts(self._committed, text)
+                self._last_result = (len(audio), text)
+            if stop.is_set():
+                # finish() takes over from here, reusing this result
+                return
+
+            if len(audio) >= self.window:
+                # Commit this window and keep a little audio as overlap
+                self._committed = self._partial
+                self._pending = [audio[-self.overlap:]] if self.overlap else []
+                self._pending_len = sum(len(a) for a in self._pending)
+                with self._lock:
+                    self._last_result = None
+
+
+def merge_transcripts(committed, new):
+    """
+    Join two transcripts, dropping words of `new` that repeat the end of
+    `committed` because of the overlapping audio between windows.
+    """
+    old_words = committed.split()
+    new_words = new.split()
+
+    def norm(w):
+        return w.lower().strip(".,!?;:")
+
+    for n in range(min(len(old_words), len(new_words)), 0, -1):
+        if [norm(w) for w in old_words[-n:]] == [norm(w) for w in new_words[:n]]:
+            new_words = new_words[n:]
+            break
+    return " ".join(old_words + new_words)
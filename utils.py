@@ -57,4 +57,17 @@ def get_audio_dir():
     else:
         base_path = os.path.dirname(os.path.abspath(__file__))
         audio_dir = os.path.join(base_path, "audio")
-    return audio_dir
\ No newline at end of file
+    return audio_dir
+
+def get_whisper_dir():
+    """
+    Get absolute path to the whisper.cpp binaries and model used by the
+    resident transcription server, whether bundled by Nuitka or run in dev.
+    """
+    if "__compiled__" in globals():
+        app_dir = get_app_dir()
+        whisper_dir = os.path.join(app_dir, "whisper")
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+        whisper_dir = os.path.join(base_path, "bin", "transcribe_build")
+    return whisper_dir
@@ -0,0 +1,164 @@
+// Fetches and parses models off the page's main thread. Replies with plain
+// typed arrays (transferred, not copied) that viewer.js turns into meshes.
+import { GLTFLoader } from './GLTFLoader.js';
+import { OBJLoader } from './OBJLoader.js';
+
+const gltfLoader = new GLTFLoader();
+const objLoader = new OBJLoader();
+
+const TEXTURE_SLOTS = ['map', 'normalMap', 'emissiveMap', 'roughnessMap', 'metalnessMap', 'aoMap', 'alphaMap'];
+const MATERIAL_PROPS = [
+    'name', 'opacity', 'transparent', 'side', 'vertexColors', 'flatShading', 'alphaTest',
+    'metalness', 'roughness', 'shininess', 'emissiveIntensity',
+];
+
+// Collects buffers to transfer, each at most once
+class Packer {
+    constructor() {
+        this.transfer = new Set();
+        this.geometries = new Map();
+        this.materials = new Map();
+        this.textures = new Map();
+        this.out = { geometries: [], materials: [], textures: [], objects: [] };
+    }
+
+    array(source) {
+        // Views into a larger buffer (e.g. a whole GLB) are copied so only their bytes move
+        const array = (source.byteOffset === 0 && source.byteLength === source.buffer.byteLength)
+            ? source : source.slice();
+        this.transfer.add(array.buffer);
+        return array;
+    }
+
+    // Quantized assets pad vertex elements to 4 bytes, which loads as interleaved data
+    deinterleave(attribute) {
+        const { array: source, stride } = attribute.data;
+        const { count, itemSize, offset } = attribute;
+        const array = new source.constructor(count * itemSize);
+        for (let i = 0; i < count; i++) {
+            for (let j = 0; j < itemSize; j++) {
+                array[i * itemSize + j] = source[i * stride + offset + j];
+            }
+        }
+        this.transfer.add(array.buffer);
+        return array;
+    }
+
+    geometry(geometry) {
+        if (this.geometries.has(geometry.uuid)) return this.geometries.get(geometry.uuid);
+
+        const attributes = {};
+        for (const [name, attribute] of Object.entries(geometry.attributes)) {
+            attributes[name] = {
+                array: attribute.isInterleavedBufferAttribute ? this.deinterleave(attribute) : this.array(attribute.array),
+                itemSize: attribute.itemSize,
+                normalized: attribute.normalized,
+            };
+        }
+        const index = geometry.index ? this.array(geometry.index.array) : null;
+
+        const id = this.out.geometries.length;
+        this.out.geometries.push({ attributes, index, groups: geometry.groups });
+        this.geometries.set(geometry.uuid, id);
+        return id;
+    }
+
+    texture(texture) {
+        if (this.textures.has(texture.uuid)) return this.textures.get(texture.uuid);
+        const image = texture.image;
+        if (!(typeof ImageBitmap !== 'undefined' && image instanceof ImageBitmap)) return null;
+
+        this.transfer.add(image);
+        const id = this.out.textures.length;
+        this.out.textures.push({
+            image,
+            flipY: texture.flipY,
+            colorSpace: texture.colorSpace,
+            wrapS: texture.wrapS,
+            wrapT: texture.wrapT,
+            channel: texture.channel,
+        });
+        this.textures.set(texture.uuid, id);
+        return id;
+    }
+
+    material(material) {
+        if (this.materials.has(material.uuid)) return this.materials.get(material.uuid);
+
+        const params = { type: material.type };
+        for (const prop of MATERIAL_PROPS) {
+            if (material[prop] !== undefined) params[prop] = material[prop];
+        }
+        if (material.color) params.color = material.color.getHex();
+        if (material.emissive) params.emissive = material.emissive.getHex();
+        for (const slot of TEXTURE_SLOTS) {
+            if (material[slot]) {
+                const id = this.texture(material[slot]);
+                if (id !== null) params[slot] = id;
+            }
+        }
+
+        const id = this.out.materials.length;
+        this.out.materials.push(params);
+        this.materials.set(material.uuid, id);
+        return id;
+    }
+
+    object(object) {
+        const kind = object.isMesh ? 'mesh' : object.isLineSegments ? 'lineSegments'
+            : object.isLine ? 'line' : object.isPoints ? 'points' : null;
+        if (!kind || !object.geometry) return;
+
+        const material = Array.isArray(object.material)
+            ? object.material.map((m) => this.material(m))
+            : this.material(object.material);
+        this.out.objects.push({
+            kind,
+            name: object.name,
+            geometry: this.geometry(object.geometry),
+            material,
+            // Hierarchy is flattened; each object keeps its world transform
+            matrix: object.matrixWorld.toArray(),
+        });
+    }
+}
+
+async function parse(url, extension) {
+    const fetchStart = performance.now();
+    const response = await fetch(url);
+    if (!response.ok) throw new Error(`HTTP ${response.status} for ${url}`);
+    const data = extension === 'obj' ? await response.text() : await response.arrayBuffer();
+    const parseStart = performance.now();
+
+    let root;
+    if (extension === 'obj') {
+        root = objLoader.parse(data);
+    } else {
+        const resourcePath = url.substring(0, url.lastIndexOf('/') + 1);
+        root = (await gltfLoader.parseAsync(data, resourcePath)).scene;
+    }
+    root.updateMatrixWorld(true);
+
+    const packer = new Packer();
+    root.traverse((child) => packer.object(child));
+    const packEnd = performance.now();
+
+    // Scene extras, e.g. the sourceFormat hint of GLBs converted from OBJ
+    packer.out.userData = root.userData;
+    packer.out.timings = {
+        fetchMs: parseStart - fetchStart,
+        parseMs: packEnd - parseStart,
+        bytes: extension === 'obj' ? data.length : data.byteLength,
+    };
+    return [packer.out, Array.from(packer.transfer)];
+}
+
+self.onmessage = async (event) => {
+    const { id, url, extension } = event.data;
+    try {
+        const [result, transfer] = await parse(url, extension);
+        self.postMessage({ id, result }, transfer);
+    } catch (error) {
+        self.postMessage({ id, error: String(error) });
+    }
+};
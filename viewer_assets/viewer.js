@@ -16,6 +16,7 @@ function applyTheme(theme) {
     currentTheme = (theme === 'light') ? 'light' : 'dark';
     const bg = (currentTheme === 'light') ? 0xeeeeee : 0x222222;
     renderer.setClearColor(bg, 1);
+    requestRender();
 }
 function setTheme(theme) { applyTheme(theme); }
 
@@ -25,94 +26,605 @@ controls.enableDamping = true;
 controls.dampingFactor = 0.05;
 controls.minDistance = 0.5;
 controls.maxDistance = 100;
+// Fired on user input and on every damped step until the camera settles
+controls.addEventListener('change', requestRender);
 
-// Lighting
-scene.add(new THREE.AmbientLight(0xffffff, 0.6));
-scene.add(new THREE.DirectionalLight(0xffffff, 0.6));
+// Lighting: one rig for the whole session, only its intensity changes per format
+const ambientLight = new THREE.AmbientLight(0xffffff, 0.6);
+const directionalLight = new THREE.DirectionalLight(0xffffff, 0.6);
+scene.add(ambientLight);
+scene.add(directionalLight);
+
+function setLightIntensity(intensity) {
+    ambientLight.intensity = intensity;
+    directionalLight.intensity = intensity;
+}
 
 // Loader
 const gltfLoader = new GLTFLoader();
 const objLoader = new OBJLoader();
 let currentModel = null;
 let currentPivot = null;
+let loadToken = 0;
+// Url of the load that has not reported finished or failed yet
+let activeLoadUrl = null;
+
+// Recently viewed models, already parsed and on the GPU, keyed by URL.
+// Asset URLs contain the content hash, so an entry can never be outdated.
+// Map keeps insertion order, so the first key is the least recently used.
+const MODEL_CACHE_MAX_VERTICES = 3000000;
+const MODEL_CACHE_MAX_ENTRIES = 8;
+const modelCache = new Map();  // url -> { object, vertices, lightIntensity, cameraDistance }
+let modelCacheHits = 0;
+let modelCacheMisses = 0;
+
+function countVertices(object) {
+    let vertices = 0;
+    object.traverse((child) => {
+        if (child.geometry && child.geometry.attributes.position) {
+            vertices += child.geometry.attributes.position.count;
+        }
+    });
+    return vertices;
+}
+
+function modelCacheVertices() {
+    let total = 0;
+    for (const entry of modelCache.values()) total += entry.vertices;
+    return total;
+}
+
+function cacheModel(url, entry) {
+    if (entry.vertices > MODEL_CACHE_MAX_VERTICES) return;
+    modelCache.set(url, entry);
+
+    // Evict least recently used entries, but never the model on screen
+    for (const [key, old] of modelCache) {
+        if (modelCache.size <= MODEL_CACHE_MAX_ENTRIES && modelCacheVertices() <= MODEL_CACHE_MAX_VERTICES) break;
+        if (old.object === currentModel || key === url) continue;
+        modelCache.delete(key);
+        disposeObject(old.object);
+    }
+}
+
+function isCached(object) {
+    for (const entry of modelCache.values()) {
+        if (entry.object === object) return true;
+    }
+    return false;
+}
+
+function clearModelCache() {
+    for (const entry of modelCache.values()) {
+        if (entry.object !== currentModel) disposeObject(entry.object);
+    }
+    // The model on screen is now uncached and gets disposed when it is cleared
+    modelCache.clear();
+    requestRender();
+}
+
+function getModelCacheStats() {
+    return {
+        entries: modelCache.size,
+        vertices: modelCacheVertices(),
+        maxVertices: MODEL_CACHE_MAX_VERTICES,
+        maxEntries: MODEL_CACHE_MAX_ENTRIES,
+        hits: modelCacheHits,
+        misses: modelCacheMisses,
+        urls: Array.from(modelCache.keys()),
+    };
+}
+
+// OBJ meshes have no baked lighting and need a brighter rig. GLBs converted
+// from OBJ by asset_optimizer.py say so in their scene extras.
+function lightIntensityFor(object, extension) {
+    return extension === 'obj' || object.userData.sourceFormat === 'obj' ? 1.4 : 0.6;
+}
+
+// Cache entry for a freshly parsed full model
+function modelEntry(object, extension) {
+    const entry = {
+        object,
+        vertices: countVertices(object),
+        lightIntensity: lightIntensityFor(object, extension),
+        cameraDistance: centerModel(object),
+    };
+    if (extension === 'obj') {
+        object.rotation.x = -Math.PI / 2;
+        object.rotation.z = -Math.PI / 2;
+    }
+    return entry;
+}
+
+// Models predicted while the user types are parsed ahead of time into the
+// model cache. A loadModel call for a model still being prefetched claims
+// that parse instead of starting a second one.
+const MAX_PREFETCHES = 2;
+const prefetches = new Map();  // url -> { promise, claimed }
+
+function prefetchModel(url) {
+    const extension = url.split('.').pop().toLowerCase();
+    if (extension !== 'glb' && extension !== 'gltf' && extension !== 'obj') return;
+    if (modelCache.has(url) || prefetches.has(url) || prefetches.size >= MAX_PREFETCHES) return;
+
+    const prefetch = { promise: parseModel(url, extension), claimed: false };
+    prefetches.set(url, prefetch);
+    prefetch.promise.then(({ object }) => {
+        if (prefetch.claimed) return;
+        cacheModel(url, modelEntry(object, extension));
+        // Too large to cache; the full load will parse it again
+        if (!modelCache.has(url)) disposeObject(object);
+    }).catch((error) => {
+        console.warn("Failed to prefetch model:", error);
+    }).finally(() => {
+        prefetches.delete(url);
+    });
+}
+
+function showModel(entry, keepCamera = false) {
+    currentModel = entry.object;
+    setLightIntensity(entry.lightIntensity);
+    scene.add(currentModel);
+    if (!keepCamera) {
+        frameCamera(entry.cameraDistance);
+    }
+    requestRender();
+}
 
-function loadModel(filePath) {
+// Loads `filePath`. If `lodPath` is given, that coarse version is shown first
+// and replaced by the full model once it has been parsed.
+function loadModel(filePath, lodPath = '') {
     const extension = filePath.split('.').pop().toLowerCase();
+    const start = performance.now();
+    // Every load ends in exactly one finished or failed report, including the one this replaces
+    if (activeLoadUrl !== null) {
+        reportToPython('reportLoadFailed', activeLoadUrl, 'superseded');
+    }
+    activeLoadUrl = filePath;
+    reportToPython('reportLoadStarted', filePath);
 
     // Remove any previous model
     clearModel();
+    pendingLoadReport = null;
+
+    // A newer loadModel call supersedes this one; its result is dropped and freed
+    const token = ++loadToken;
+    const isStale = (object) => {
+        if (token === loadToken) return false;
+        disposeObject(object);
+        return true;
+    };
+
+    const cached = modelCache.get(filePath);
+    if (cached) {
+        modelCacheHits++;
+        modelCache.delete(filePath);
+        modelCache.set(filePath, cached);
+        showModel(cached);
+        reportAfterFirstRender(filePath, { cached: true }, start);
+        return;
+    }
+    modelCacheMisses++;
+
+    if (extension !== 'glb' && extension !== 'gltf' && extension !== 'obj') {
+        console.error("Unsupported model format:", extension);
+        activeLoadUrl = null;
+        reportToPython('reportLoadFailed', filePath, `Unsupported model format: ${extension}`);
+        return;
+    }
 
-    if (extension === 'glb' || extension === 'gltf') {
-        gltfLoader.load(
-            filePath,
-            (gltf) => {
-                currentModel = gltf.scene;
-                scene.add(currentModel);
-                centerAndPositionModel(currentModel);
-                // currentModel.rotation.y = -Math.PI / 2;
-            },
-            undefined,
-            (error) => {
-                console.error("Failed to load GLB/GLTF model:", error);
+    // LODs are never cached; the full model replaces them
+    let lodObject = null;
+    let lodShownMs = null;
+    let fullShown = false;
+    if (lodPath) {
+        // Queued before the full model, so the worker parses it first
+        parseModel(lodPath, 'glb').then(({ object }) => {
+            if (isStale(object)) return;
+            if (fullShown) {
+                disposeObject(object);
+                return;
             }
-        );
-    } else if (extension === 'obj') {
-        objLoader.load(
-            filePath,
-            (obj) => {
-                currentModel = obj;
-                scene.add(currentModel);
-                scene.add(new THREE.AmbientLight(0xffffff, 0.8));
-                scene.add(new THREE.DirectionalLight(0xffffff, 0.8));
-                centerAndPositionModel(currentModel);
-                currentModel.rotation.x = -Math.PI / 2;
-                currentModel.rotation.z = -Math.PI / 2;
-            },
-            undefined,
-            (error) => {
-                console.error("Failed to load OBJ model:", error);
+            lodObject = object;
+            lodShownMs = performance.now() - start;
+            showModel({
+                object,
+                lightIntensity: lightIntensityFor(object, extension),
+                cameraDistance: centerModel(object),
+            });
+        }).catch((error) => {
+            console.warn("Failed to load LOD, waiting for the full model:", error);
+        });
+    }
+
+    // A prefetch already parsing this model is taken over rather than repeated
+    const prefetch = prefetches.get(filePath);
+    if (prefetch) {
+        prefetch.claimed = true;
+    }
+    const parsed = prefetch ? prefetch.promise : parseModel(filePath, extension);
+
+    parsed.then(({ object, timings }) => {
+        if (isStale(object)) return;
+        fullShown = true;
+        const entry = modelEntry(object, extension);
+
+        // Swap out the LOD without moving the camera the user may already be orbiting
+        const upgrading = lodObject !== null && currentModel === lodObject;
+        if (upgrading) {
+            clearModel();
+        }
+        showModel(entry, upgrading);
+        cacheModel(filePath, entry);
+        reportAfterFirstRender(filePath, { cached: false, prefetched: !!prefetch, lodShownMs, ...timings }, start);
+    }).catch((error) => {
+        if (token !== loadToken) return;
+        console.error(`Failed to load ${extension.toUpperCase()} model:`, error);
+        activeLoadUrl = null;
+        reportToPython('reportLoadFailed', filePath, String(error));
+    });
+}
+
+// Bridge to ModelViewer over QWebChannel. It is absent when the page is opened
+// in a plain browser, where the window.* functions below can be used instead.
+let bridge = null;
+if (typeof QWebChannel !== 'undefined' && typeof qt !== 'undefined') {
+    new QWebChannel(qt.webChannelTransport, (channel) => {
+        bridge = channel.objects.bridge;
+        bridge.loadRequested.connect(loadModel);
+        bridge.clearRequested.connect(clearModel);
+        bridge.themeRequested.connect(setTheme);
+        bridge.thumbnailRequested.connect(requestThumbnail);
+        bridge.prefetchRequested.connect(prefetchModel);
+        bridge.ready();
+    });
+}
+
+function reportToPython(method, ...args) {
+    if (bridge) {
+        bridge[method](...args);
+    }
+}
+
+// Thumbnails for the model gallery, drawn one at a time by a separate small
+// renderer that never touches the visible scene or camera.
+let thumbnailRenderer = null;
+const thumbnailQueue = [];
+let thumbnailBusy = false;
+
+function requestThumbnail(key, url, size) {
+    thumbnailQueue.push({ key, url, size });
+    nextThumbnail();
+}
+
+async function nextThumbnail() {
+    if (thumbnailBusy || !thumbnailQueue.length) return;
+    thumbnailBusy = true;
+    const { key, url, size } = thumbnailQueue.shift();
+    try {
+        reportToPython('reportThumbnail', key, await renderThumbnail(url, size));
+    } catch (error) {
+        console.error("Failed to render thumbnail:", error);
+        reportToPython('reportThumbnailFailed', key, String(error));
+    }
+    thumbnailBusy = false;
+    nextThumbnail();
+}
+
+// PNG data URL of the model at `url` (its LOD, when it has one), framed like the main view
+async function renderThumbnail(url, size) {
+    const extension = url.split('.').pop().toLowerCase();
+    const { object } = await parseModel(url, extension);
+    const distance = centerModel(object);
+    if (extension === 'obj') {
+        object.rotation.x = -Math.PI / 2;
+        object.rotation.z = -Math.PI / 2;
+    }
+
+    if (!thumbnailRenderer) {
+        thumbnailRenderer = new THREE.WebGLRenderer({ antialias: true, alpha: true });
+        thumbnailRenderer.setClearColor(0x000000, 0);
+    }
+    thumbnailRenderer.setSize(size, size, false);
+
+    const intensity = lightIntensityFor(object, extension);
+    const thumbnailScene = new THREE.Scene();
+    thumbnailScene.add(new THREE.AmbientLight(0xffffff, intensity));
+    thumbnailScene.add(new THREE.DirectionalLight(0xffffff, intensity));
+    thumbnailScene.add(object);
+
+    const thumbnailCamera = new THREE.PerspectiveCamera(camera.fov, 1, 0.1, 1000);
+    thumbnailCamera.position.set(0, 0, distance);
+    thumbnailCamera.lookAt(0, 0, 0);
+
+    // Read back in the same task as the draw, so no preserveDrawingBuffer is needed
+    thumbnailRenderer.render(thumbnailScene, thumbnailCamera);
+    const dataUrl = thumbnailRenderer.domElement.toDataURL('image/png');
+    disposeObject(object);
+    return dataUrl;
+}
+
+// A load counts as complete once the model has actually been drawn
+let pendingLoadReport = null;
+
+function reportAfterFirstRender(url, timings, start) {
+    pendingLoadReport = { url, timings, start, shownAt: performance.now() };
+    requestRender();
+}
+
+function finishLoadReport(renderedAt) {
+    const { url, timings, start, shownAt } = pendingLoadReport;
+    pendingLoadReport = null;
+    activeLoadUrl = null;
+    lastLoadTimings = {
+        url,
+        ...timings,
+        firstRenderMs: renderedAt - shownAt,
+        totalMs: renderedAt - start,
+    };
+    console.log("Model loaded:", JSON.stringify(lastLoadTimings));
+    reportToPython('reportLoadFinished', url, JSON.stringify(lastLoadTimings));
+}
+
+// Parsing runs in model_worker.js; the main-thread loaders are only a fallback
+// for when the worker cannot be started.
+let modelWorker = null;
+let modelWorkerFailed = false;
+let workerRequestId = 0;
+const workerRequests = new Map();  // id -> { resolve, reject }
+let lastLoadTimings = null;
+
+function getModelWorker() {
+    if (modelWorker || modelWorkerFailed) return modelWorker;
+    try {
+        modelWorker = new Worker(new URL('./model_worker.js', import.meta.url), { type: 'module' });
+    } catch (error) {
+        console.warn("Model worker unavailable, parsing on the main thread:", error);
+        modelWorkerFailed = true;
+        return null;
+    }
+    modelWorker.onmessage = (event) => {
+        const { id, result, error } = event.data;
+        const request = workerRequests.get(id);
+        if (!request) return;
+        workerRequests.delete(id);
+        if (error) {
+            request.reject(new Error(error));
+        } else {
+            request.resolve(result);
+        }
+    };
+    modelWorker.onerror = (event) => {
+        // The worker script itself failed; pending requests retry on the main thread
+        console.warn("Model worker failed, parsing on the main thread:", event.message);
+        modelWorkerFailed = true;
+        modelWorker.terminate();
+        modelWorker = null;
+        for (const request of workerRequests.values()) request.resolve(null);
+        workerRequests.clear();
+    };
+    return modelWorker;
+}
+
+// Resolves with the packed model, or null if the worker is not usable
+function parseInWorker(url, extension) {
+    return new Promise((resolve, reject) => {
+        const worker = getModelWorker();
+        if (!worker) {
+            resolve(null);
+            return;
+        }
+        const id = ++workerRequestId;
+        workerRequests.set(id, { resolve, reject });
+        worker.postMessage({ id, url, extension });
+    });
+}
+
+async function parseModel(url, extension) {
+    const start = performance.now();
+    const packed = await parseInWorker(url, extension);
+    if (packed) {
+        const buildStart = performance.now();
+        const object = buildModel(packed);
+        return { object, timings: { ...packed.timings, buildMs: performance.now() - buildStart, worker: true } };
+    }
+
+    const result = await (extension === 'obj' ? objLoader : gltfLoader).loadAsync(url);
+    const object = extension === 'obj' ? result : result.scene;
+    return { object, timings: { parseMs: performance.now() - start, worker: false } };
+}
+
+const TEXTURE_SLOTS = ['map', 'normalMap', 'emissiveMap', 'roughnessMap', 'metalnessMap', 'aoMap', 'alphaMap'];
+const OBJECT_TYPES = {
+    mesh: THREE.Mesh,
+    line: THREE.Line,
+    lineSegments: THREE.LineSegments,
+    points: THREE.Points,
+};
+
+// Turns the worker's typed arrays back into a scene graph; no parsing happens here
+function buildModel(packed) {
+    const textures = packed.textures.map((t) => {
+        const texture = new THREE.Texture(t.image);
+        texture.flipY = t.flipY;
+        texture.colorSpace = t.colorSpace;
+        texture.wrapS = t.wrapS;
+        texture.wrapT = t.wrapT;
+        texture.channel = t.channel;
+        texture.needsUpdate = true;
+        return texture;
+    });
+
+    const materials = packed.materials.map(({ type, ...params }) => {
+        const material = new (THREE[type] || THREE.MeshStandardMaterial)();
+        for (const [key, value] of Object.entries(params)) {
+            if (TEXTURE_SLOTS.includes(key)) {
+                material[key] = textures[value];
+            } else if ((key === 'color' || key === 'emissive') && material[key]) {
+                material[key].setHex(value);
+            } else if (key in material) {
+                material[key] = value;
             }
-        );
-    } else {
-        console.error("Unsupported model format:", extension);
+        }
+        return material;
+    });
+
+    const geometries = packed.geometries.map((g) => {
+        const geometry = new THREE.BufferGeometry();
+        for (const [name, a] of Object.entries(g.attributes)) {
+            geometry.setAttribute(name, new THREE.BufferAttribute(a.array, a.itemSize, a.normalized));
+        }
+        if (g.index) {
+            geometry.setIndex(new THREE.BufferAttribute(g.index, 1));
+        }
+        for (const group of g.groups) {
+            geometry.addGroup(group.start, group.count, group.materialIndex);
+        }
+        return geometry;
+    });
+
+    const root = new THREE.Group();
+    root.userData = packed.userData;
+    for (const o of packed.objects) {
+        const material = Array.isArray(o.material) ? o.material.map((i) => materials[i]) : materials[o.material];
+        const object = new OBJECT_TYPES[o.kind](geometries[o.geometry], material);
+        object.name = o.name;
+        object.matrix.fromArray(o.matrix);
+        object.matrix.decompose(object.position, object.quaternion, object.scale);
+        root.add(object);
     }
+    return root;
 }
 
-function centerAndPositionModel(model) {
+function getLoadTimings() {
+    return lastLoadTimings;
+}
+
+// Moves the model to the origin and returns a camera distance that frames it
+function centerModel(model) {
     const box = new THREE.Box3().setFromObject(model);
     const size = box.getSize(new THREE.Vector3()).length();
     const center = box.getCenter(new THREE.Vector3());
 
     model.position.sub(center);
-    camera.position.set(0, 0, size * 0.8);
+    return size * 0.8;
+}
+
+function frameCamera(distance) {
+    camera.position.set(0, 0, distance);
     camera.lookAt(0, 0, 0);
     controls.update();
 }
 
+// Free the GPU buffers, programs and textures held by an object tree
+function disposeMaterial(material) {
+    for (const value of Object.values(material)) {
+        if (value && value.isTexture) {
+            value.dispose();
+        }
+    }
+    material.dispose();
+}
+
+function disposeObject(object) {
+    object.traverse((child) => {
+        if (child.geometry) {
+            child.geometry.dispose();
+        }
+        if (child.material) {
+            const materials = Array.isArray(child.material) ? child.material : [child.material];
+            materials.forEach(disposeMaterial);
+        }
+    });
+}
+
 function clearModel() {
     if (currentModel) {
         scene.remove(currentModel);
+        // Cached models keep their GPU resources for a quick switch back
+        if (!isCached(currentModel)) {
+            disposeObject(currentModel);
+        }
         currentModel = null;
         console.log("Model cleared.");
+        requestRender();
     }
 }
 
+function getMemoryStats() {
+    const info = renderer.info;
+    return {
+        geometries: info.memory.geometries,
+        textures: info.memory.textures,
+        programs: info.programs ? info.programs.length : 0,
+        drawCalls: info.render.calls,
+        triangles: info.render.triangles,
+    };
+}
+
 // Expose globally so Python can call functions
 window.loadModel = loadModel;
+window.prefetchModel = prefetchModel;
 window.clearModel = clearModel;
 window.setTheme = setTheme;
+window.getMemoryStats = getMemoryStats;
+window.getModelCacheStats = getModelCacheStats;
+window.clearModelCache = clearModelCache;
+window.getLoadTimings = getLoadTimings;
+
+// Render on demand: a frame is only drawn after something changed
+// (camera input, damping, resize, model or theme change), so an idle viewer draws nothing.
+let renderPending = false;
+let framesRendered = 0;
+let lastFrameTimeMs = 0;
+const recentFrames = [];  // timestamps of frames drawn in the last second
 
-// Animation loop
-function animate() {
-    requestAnimationFrame(animate);
+function requestRender() {
+    if (!renderPending) {
+        renderPending = true;
+        requestAnimationFrame(renderFrame);
+    }
+}
+
+function renderFrame() {
+    renderPending = false;
+    const start = performance.now();
+    // While damping is still moving the camera this fires 'change' and queues the next frame
     controls.update();
     renderer.render(scene, camera);
+    const end = performance.now();
+
+    if (pendingLoadReport) {
+        finishLoadReport(end);
+    }
+
+    framesRendered++;
+    lastFrameTimeMs = end - start;
+    recentFrames.push(end);
+    while (recentFrames.length && recentFrames[0] < end - 1000) {
+        recentFrames.shift();
+    }
+}
+
+function getRenderStats() {
+    const now = performance.now();
+    while (recentFrames.length && recentFrames[0] < now - 1000) {
+        recentFrames.shift();
+    }
+    return {
+        fps: recentFrames.length,
+        frameTimeMs: lastFrameTimeMs,
+        framesRendered: framesRendered,
+    };
 }
-animate();
+window.getRenderStats = getRenderStats;
+
+requestRender();
 
 // Responsive resize
 window.addEventListener('resize', () => {
     camera.aspect = window.innerWidth / window.innerHeight;
     camera.updateProjectionMatrix();
     renderer.setSize(window.innerWidth, window.innerHeight);
+    requestRender();
 });